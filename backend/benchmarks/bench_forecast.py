@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for forecast aggregation: legacy per-day lists vs the one-pass engine
+
+Usage (from the backend directory):
+    python benchmarks/bench_forecast.py
+    python benchmarks/bench_forecast.py --points 40 400 4000 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.forecast_aggregation import aggregate_forecast
+
+CONDITIONS = [("Clear", "clear sky"), ("Clouds", "broken clouds"), ("Clouds", "few clouds"),
+              ("Rain", "light rain"), ("Rain", "moderate rain"), ("Snow", "light snow")]
+
+
+def make_payload(points: int, timezone_offset: int = 3600):
+    rng = random.Random(points)
+    start = int(time.time()) // 10800 * 10800
+    items = []
+    for i in range(points):
+        main, description = rng.choice(CONDITIONS)
+        item = {
+            "dt": start + i * 10800,
+            "main": {"temp": rng.uniform(-5, 30)},
+            "weather": [{"main": main, "description": description}],
+            "wind": {"speed": rng.uniform(0, 15)},
+        }
+        if main == "Rain":
+            item["rain"] = {"3h": rng.uniform(0, 4)}
+        items.append(item)
+    return {"city": {"timezone": timezone_offset}, "list": items}
+
+
+def legacy_transform(data):
+    """The previous WeatherService._transform_forecast, kept for comparison"""
+    daily_forecasts = {}
+    for item in data["list"]:
+        date = datetime.fromtimestamp(item["dt"]).strftime("%Y-%m-%d")
+        if date not in daily_forecasts:
+            daily_forecasts[date] = {"temps": [], "conditions": [], "descriptions": []}
+        daily_forecasts[date]["temps"].append(item["main"]["temp"])
+        daily_forecasts[date]["conditions"].append(item["weather"][0]["main"].lower())
+        daily_forecasts[date]["descriptions"].append(item["weather"][0]["description"])
+
+    forecast_data = []
+    days = ["Today", "Tomorrow", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    for i, (date, forecast) in enumerate(list(daily_forecasts.items())[:5]):
+        condition = max(set(forecast["conditions"]), key=forecast["conditions"].count)
+        description = max(set(forecast["descriptions"]), key=forecast["descriptions"].count)
+        forecast_data.append({
+            "date": date,
+            "day": days[i] if i < len(days) else datetime.strptime(date, "%Y-%m-%d").strftime("%A"),
+            "high": round(max(forecast["temps"])),
+            "low": round(min(forecast["temps"])),
+            "condition": condition,
+            "description": description,
+        })
+    return forecast_data
+
+
+def time_us(fn, payload, repeat):
+    fn(payload)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    return round((time.perf_counter() - started) / repeat * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, nargs="+", default=[40, 400, 4000])
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    results = []
+    for points in args.points:
+        payload = make_payload(points)
+        # Aggregate every day in the payload so longer series do real work
+        days = points // 8 + 1
+        row = {
+            "points": points,
+            "legacy_us": time_us(legacy_transform, payload, args.repeat),
+            "engine_us": time_us(lambda p: aggregate_forecast(p, days=days), payload, args.repeat),
+        }
+        results.append(row)
+
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
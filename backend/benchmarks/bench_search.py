@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Compare city search latency: local geocoding index vs the upstream geo API path
+
+Usage (from the backend directory):
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --latency-ms 150 --iterations 2000
+    python benchmarks/bench_search.py --live   # hit the real OpenWeather API
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from services.geo_index import DEFAULT_GAZETTEER, CityIndex
+from services.weather_service import WeatherService
+
+QUERIES = ["lon", "London", "pari", "new y", "san", "Tokio", "berln", "springfield, us", "mel", "sao paulo"]
+
+
+def _percentiles(samples_us):
+    ordered = sorted(samples_us)
+    return {
+        "p50_us": round(ordered[len(ordered) // 2], 2),
+        "p99_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+        "mean_us": round(statistics.fmean(ordered), 2),
+    }
+
+
+def bench_local(index: CityIndex, iterations: int):
+    samples = []
+    for i in range(iterations):
+        query = QUERIES[i % len(QUERIES)]
+        started = time.perf_counter()
+        index.search(query, 5)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return _percentiles(samples)
+
+
+async def bench_upstream(iterations: int, latency_ms: float, live: bool):
+    if live:
+        client = httpx.AsyncClient()
+    else:
+        os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+        async def handler(request):
+            await asyncio.sleep(latency_ms / 1000)
+            return httpx.Response(200, json=[{"name": "London", "country": "GB", "state": "England", "lat": 51.5, "lon": -0.12}])
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    service = WeatherService(client=client)
+    samples = []
+    try:
+        for i in range(iterations):
+            query = QUERIES[i % len(QUERIES)]
+            started = time.perf_counter()
+            await service.search_cities(query, 5)
+            samples.append((time.perf_counter() - started) * 1e6)
+    finally:
+        await service.aclose()
+    return _percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gazetteer", default=os.getenv("GEO_INDEX_PATH", DEFAULT_GAZETTEER))
+    parser.add_argument("--iterations", type=int, default=10000, help="Local index queries")
+    parser.add_argument("--upstream-iterations", type=int, default=50, help="Upstream path queries")
+    parser.add_argument("--latency-ms", type=float, default=120.0, help="Simulated geo API latency")
+    parser.add_argument("--live", action="store_true", help="Call the real OpenWeather geo API")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = CityIndex.load(args.gazetteer)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    results = {
+        "cities": len(index),
+        "index_load_ms": round(load_ms, 2),
+        "local": bench_local(index, args.iterations),
+        "upstream": asyncio.run(bench_upstream(args.upstream_iterations, args.latency_ms, args.live)),
+        "upstream_mode": "live" if args.live else f"mock ({args.latency_ms} ms)",
+    }
+    results["speedup_p50"] = round(results["upstream"]["p50_us"] / max(results["local"]["p50_us"], 0.01), 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
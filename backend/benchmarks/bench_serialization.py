@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compare response paths for a cached forecast: FastAPI's dict encoding vs pre-encoded bytes
+
+Usage (from the backend directory):
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --requests 5000 --gzip
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request
+
+from services import serialization
+from services.cache import MemoryCache
+from services.http_cache import cached_response
+
+PAYLOAD = {
+    "city": "London",
+    "country": "GB",
+    "forecast": [
+        {"date": f"2024-01-0{i + 1}", "day": "Monday", "high": 12, "low": 4, "mean": 8,
+         "precipitation": 1.2, "windMax": 24, "condition": "rain", "description": "light rain"}
+        for i in range(5)
+    ],
+}
+
+
+def build_app(cache: MemoryCache) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/dict")
+    async def as_dict():
+        # Previous path: return the cached dict and let FastAPI encode it
+        return (await cache.get_entry("forecast", "london")).value
+
+    @app.get("/bytes")
+    async def as_bytes(request: Request):
+        return cached_response(request, await cache.get_entry("forecast", "london"))
+
+    return app
+
+
+async def run(path: str, requests: int, headers: dict) -> dict:
+    cache = MemoryCache()
+    await cache.set("forecast", "london", PAYLOAD)
+    transport = httpx.ASGITransport(app=build_app(cache))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(path, headers=headers)
+        size = len(response.content)
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path, headers=headers)
+        elapsed = time.perf_counter() - started
+    return {"req_per_s": round(requests / elapsed), "body_bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--gzip", action="store_true", help="Send Accept-Encoding: gzip")
+    args = parser.parse_args()
+
+    headers = {"Accept-Encoding": "gzip" if args.gzip else "identity"}
+    # Single process, sequential requests: the figures are per-worker throughput
+    print(json.dumps({
+        "orjson": serialization.orjson is not None,
+        "requests": args.requests,
+        "dict_response": asyncio.run(run("/dict", args.requests, headers)),
+        "cached_bytes": asyncio.run(run("/bytes", args.requests, headers)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start time of the API, phase by phase, in fresh interpreter processes
+
+Each run spawns a new Python process that imports main, builds the app with
+create_app(), runs the lifespan startup and serves one GET /health in-process.
+Reports the median and minimum of every phase, plus the modules that are
+imported by the time the app is ready. No network calls are made.
+
+Usage (from the backend directory):
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.create_app()
+created = time.perf_counter()
+
+async def serve():
+    import httpx
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            (await client.get("/health")).raise_for_status()
+        return ready, time.perf_counter()
+
+ready, served = asyncio.run(serve())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "lifespan_ms": (ready - created) * 1000,
+    "first_request_ms": (served - ready) * 1000,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def probe() -> dict:
+    env = {**os.environ, "OPENWEATHER_API_KEY": os.environ.get("OPENWEATHER_API_KEY", "bench"),
+           "CACHE_BACKEND": "memory", "CACHE_SNAPSHOT_PATH": "", "HISTORY_PATH": "", "LOG_LEVEL": "WARNING"}
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.runs)]
+    phases = ["import_ms", "create_app_ms", "lifespan_ms", "first_request_ms", "process_ms"]
+    print(json.dumps({
+        "runs": args.runs,
+        "median": {phase: round(statistics.median(run[phase] for run in runs), 1) for phase in phases},
+        "min": {phase: round(min(run[phase] for run in runs), 1) for phase in phases},
+        "modules": runs[-1]["modules"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
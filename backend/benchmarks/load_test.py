@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Load-test the API against the offline OpenWeather stand-in
+
+Starts benchmarks/mock_openweather.py in a subprocess, drives the FastAPI app
+in-process through its real lifespan, cache and pooled upstream client, and
+prints one JSON document with RPS, latency percentiles and upstream call
+counts per scenario. Each scenario starts from a fresh app state.
+
+Scenarios:
+    cold    every request is a different location (all cache misses)
+    hot     requests spread over a few pre-warmed cities
+    dashboard  current weather and forecast requested together for each of many cities
+    herd    bursts of concurrent requests for one city right after it expires
+    search  city search, mostly answered locally with some upstream fallthrough
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --scenarios hot herd --requests 5000 --concurrency 100
+    python benchmarks/load_test.py --latency-ms 150 --error-rate 0.01 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+
+SCENARIOS = ["cold", "hot", "dashboard", "herd", "search"]
+HOT_CITIES = ["London", "Paris", "Tokyo", "New York", "Sydney", "Berlin", "Madrid", "Rome", "Toronto", "Mumbai"]
+SEARCH_QUERIES = ["lon", "London", "pari", "new y", "san", "Tokio", "berln", "springfield, us", "mel", "sao paulo"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies_ms, statuses, elapsed, upstream):
+    ordered = sorted(latencies_ms)
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(_percentile(ordered, 0.50), 2),
+        "p95_ms": round(_percentile(ordered, 0.95), 2),
+        "p99_ms": round(_percentile(ordered, 0.99), 2),
+        "max_ms": round(ordered[-1], 2),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "upstream_calls": upstream["total_calls"],
+        "upstream_by_endpoint": upstream["calls"],
+        "upstream_injected": upstream["injected"],
+    }
+
+
+async def drive(client, requests, concurrency):
+    """Send (path, params) requests with `concurrency` workers; return latencies, statuses and wall time"""
+    queue = iter(requests)
+    latencies = []
+    statuses = Counter()
+
+    async def worker():
+        for path, params in queue:
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def run_scenario(name, args, mock_url):
+    # A fresh app gives every scenario an empty cache and zeroed counters
+    from main import create_app
+
+    app = create_app()
+    rng = random.Random(name)
+
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://loadtest"
+    ) as client, httpx.AsyncClient(base_url=mock_url) as mock:
+
+        async def upstream_stats():
+            return (await mock.get("/__stats")).json()
+
+        if name == "cold":
+            # Distinct geohash cells, so nothing is shared
+            requests = [("/weather/current", {"lat": round(rng.uniform(-60, 70), 3), "lon": round(rng.uniform(-180, 180), 3)})
+                        for _ in range(args.requests)]
+            await mock.post("/__reset")
+            latencies, statuses, elapsed = await drive(client, requests, args.concurrency)
+
+        elif name == "hot":
+            for city in HOT_CITIES:
+                await client.get("/weather/current", params={"city": city})
+                await client.get("/weather/forecast", params={"city": city})
+            requests = [(rng.choice(["/weather/current", "/weather/forecast"]), {"city": rng.choice(HOT_CITIES)})
+                        for _ in range(args.requests)]
+            await mock.post("/__reset")
+            latencies, statuses, elapsed = await drive(client, requests, args.concurrency)
+
+        elif name == "dashboard":
+            # Pairs of concurrent misses, as the frontend sends them; compare UPSTREAM_FETCH_MODE settings
+            cities = [f"Town{i}" for i in range(max(1, args.requests // 2))]
+            requests = [(path, {"city": city}) for city in cities for path in ("/weather/current", "/weather/forecast")]
+            await mock.post("/__reset")
+            latencies, statuses, elapsed = await drive(client, requests, args.concurrency)
+
+        elif name == "herd":
+            await client.get("/weather/current", params={"city": "London"})
+            await mock.post("/__reset")
+            latencies, statuses, elapsed = [], Counter(), 0.0
+            rounds = max(1, args.requests // args.concurrency)
+            for _ in range(rounds):
+                # Expire the entry, then hit it with one full burst
+                await app.state.backend.cache.clear()
+                burst = [("/weather/current", {"city": "London"})] * args.concurrency
+                round_latencies, round_statuses, round_elapsed = await drive(client, burst, args.concurrency)
+                latencies += round_latencies
+                statuses.update(round_statuses)
+                elapsed += round_elapsed
+
+        elif name == "search":
+            # Roughly 1 in 5 queries is unknown locally and goes upstream
+            requests = [
+                ("/weather/search", {"query": rng.choice(SEARCH_QUERIES) if rng.random() < 0.8 else f"qx{rng.randrange(10 ** 6)}"})
+                for _ in range(args.requests)
+            ]
+            await mock.post("/__reset")
+            latencies, statuses, elapsed = await drive(client, requests, args.concurrency)
+
+        else:
+            raise ValueError(f"Unknown scenario: {name}")
+
+        result = summarize(latencies, statuses, elapsed, await upstream_stats())
+        result["concurrency"] = args.concurrency
+        return result
+
+
+async def run(args, mock_url):
+    results = {}
+    for name in args.scenarios:
+        results[name] = await run_scenario(name, args, mock_url)
+    return results
+
+
+def start_mock(args):
+    port = _free_port()
+    process = subprocess.Popen([
+        sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "mock_openweather.py"),
+        "--port", str(port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--rate-limit-rate", str(args.rate_limit_rate),
+    ])
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{url}/__stats", timeout=0.5)
+            return process, url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Mock OpenWeather server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    process, mock_url = start_mock(args)
+    # Configure the app before it is imported: offline upstream, no quota, no snapshot or history files
+    os.environ.update({
+        "OPENWEATHER_API_ROOT": mock_url,
+        "OPENWEATHER_API_KEY": os.getenv("OPENWEATHER_API_KEY") or "loadtest",
+        "UPSTREAM_CALLS_PER_MINUTE": os.getenv("UPSTREAM_CALLS_PER_MINUTE", "0"),
+        "CACHE_BACKEND": "memory",
+        "CACHE_SNAPSHOT_PATH": "",
+        "HISTORY_PATH": "",
+    })
+    # Keep per-request log lines out of the report
+    logging.disable(logging.WARNING)
+
+    try:
+        results = asyncio.run(run(args, mock_url))
+    finally:
+        process.terminate()
+        process.wait()
+
+    report = {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "fetch_mode": os.getenv("UPSTREAM_FETCH_MODE", "separate"),
+            "python": sys.version.split()[0],
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
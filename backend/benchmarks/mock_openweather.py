@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the OpenWeather endpoints the backend calls
+
+Serves deterministic current weather, 5-day forecast, One Call and geocoding payloads
+with configurable latency, error rate and 429 injection. Point the backend
+at it with OPENWEATHER_API_ROOT=http://127.0.0.1:<port>.
+
+Usage (from the backend directory):
+    python benchmarks/mock_openweather.py --port 8099
+    python benchmarks/mock_openweather.py --latency-ms 120 --error-rate 0.02 --rate-limit-rate 0.01
+
+Control endpoints:
+    GET  /__stats    calls per endpoint and injected failures
+    POST /__reset    zero the counters
+    POST /__config   change latency_ms, jitter_ms, error_rate or rate_limit_rate at runtime
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CONDITIONS = [("Clear", "clear sky"), ("Clouds", "broken clouds"), ("Clouds", "few clouds"),
+              ("Rain", "light rain"), ("Rain", "moderate rain"), ("Snow", "light snow")]
+
+# Names containing this are answered with OpenWeather's 404 "city not found"
+UNKNOWN_MARKER = "nowhere"
+
+
+def _seed(*parts: Any) -> int:
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode(), digest_size=8).digest(), "big")
+
+
+def _place(q: Optional[str], lat: Optional[float], lon: Optional[float]) -> Dict[str, Any]:
+    if q:
+        name, _, country = q.partition(",")
+        rng = random.Random(_seed(name.strip().lower()))
+        return {"name": name.strip().title(), "country": (country.strip() or "GB").upper(),
+                "lat": round(rng.uniform(-60, 70), 4), "lon": round(rng.uniform(-180, 180), 4)}
+    return {"name": f"Place {lat:.2f},{lon:.2f}", "country": "XX", "lat": lat, "lon": lon}
+
+
+def current_payload(place: Dict[str, Any], now: int) -> Dict[str, Any]:
+    rng = random.Random(_seed(place["name"], now // 600))
+    main, description = rng.choice(CONDITIONS)
+    return {
+        "coord": {"lat": place["lat"], "lon": place["lon"]},
+        "weather": [{"main": main, "description": description}],
+        "main": {"temp": round(rng.uniform(-5, 30), 2), "feels_like": round(rng.uniform(-8, 30), 2),
+                 "pressure": rng.randint(990, 1030), "humidity": rng.randint(30, 95)},
+        "visibility": 10000,
+        "wind": {"speed": round(rng.uniform(0, 12), 2)},
+        "dt": now,
+        "sys": {"country": place["country"], "sunrise": now - 21600, "sunset": now + 21600},
+        "timezone": 0,
+        "name": place["name"],
+    }
+
+
+def forecast_payload(place: Dict[str, Any], now: int) -> Dict[str, Any]:
+    rng = random.Random(_seed(place["name"], now // 10800))
+    start = now // 10800 * 10800
+    items = []
+    for i in range(40):
+        main, description = rng.choice(CONDITIONS)
+        item = {
+            "dt": start + i * 10800,
+            "main": {"temp": round(rng.uniform(-5, 30), 2), "feels_like": round(rng.uniform(-8, 30), 2),
+                     "pressure": rng.randint(990, 1030), "humidity": rng.randint(30, 95)},
+            "weather": [{"main": main, "description": description}],
+            "wind": {"speed": round(rng.uniform(0, 12), 2)},
+            "visibility": 10000,
+        }
+        if main == "Rain":
+            item["rain"] = {"3h": round(rng.uniform(0, 4), 2)}
+        items.append(item)
+    return {
+        "list": items,
+        "city": {"name": place["name"], "country": place["country"], "timezone": 0,
+                 "coord": {"lat": place["lat"], "lon": place["lon"]},
+                 "sunrise": now - 21600, "sunset": now + 21600},
+    }
+
+
+def onecall_payload(lat: float, lon: float, now: int) -> Dict[str, Any]:
+    rng = random.Random(_seed(round(lat, 2), round(lon, 2), now // 600))
+    main, description = rng.choice(CONDITIONS)
+    daily = []
+    for i in range(8):
+        day_main, day_description = rng.choice(CONDITIONS)
+        low = rng.uniform(-5, 20)
+        daily.append({
+            "dt": now // 86400 * 86400 + i * 86400 + 43200,
+            "temp": {"min": round(low, 2), "max": round(low + rng.uniform(2, 10), 2), "day": round(low + 4, 2),
+                     "night": round(low + 1, 2), "eve": round(low + 3, 2), "morn": round(low + 2, 2)},
+            "weather": [{"main": day_main, "description": day_description}],
+            "wind_speed": round(rng.uniform(0, 12), 2),
+            **({"rain": round(rng.uniform(0, 8), 2)} if day_main == "Rain" else {}),
+        })
+    return {
+        "lat": lat,
+        "lon": lon,
+        "timezone_offset": 0,
+        "current": {
+            "dt": now, "sunrise": now - 21600, "sunset": now + 21600,
+            "temp": round(rng.uniform(-5, 30), 2), "feels_like": round(rng.uniform(-8, 30), 2),
+            "pressure": rng.randint(990, 1030), "humidity": rng.randint(30, 95), "visibility": 10000,
+            "wind_speed": round(rng.uniform(0, 12), 2), "weather": [{"main": main, "description": description}],
+        },
+        "daily": daily,
+    }
+
+
+def create_mock_app(
+    latency_ms: float = 50.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    seed: int = 0,
+) -> FastAPI:
+    app = FastAPI(title="Mock OpenWeather")
+    config = {"latency_ms": latency_ms, "jitter_ms": jitter_ms, "error_rate": error_rate, "rate_limit_rate": rate_limit_rate}
+    calls: Counter = Counter()
+    injected: Counter = Counter()
+    rng = random.Random(seed)
+
+    async def upstream(endpoint: str, build):
+        calls[endpoint] += 1
+        delay = config["latency_ms"] + rng.uniform(0, config["jitter_ms"])
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        roll = rng.random()
+        if roll < config["rate_limit_rate"]:
+            injected["429"] += 1
+            return JSONResponse({"cod": 429, "message": "rate limited"}, status_code=429, headers={"Retry-After": "1"})
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            injected["5xx"] += 1
+            return JSONResponse({"cod": 503, "message": "service unavailable"}, status_code=503)
+        payload = build()
+        if payload is None:
+            injected["404"] += 1
+            return JSONResponse({"cod": "404", "message": "city not found"}, status_code=404)
+        return payload
+
+    def _located(q, lat, lon):
+        if q and UNKNOWN_MARKER in q.lower():
+            return None
+        return _place(q, lat, lon)
+
+    @app.get("/data/2.5/weather")
+    async def weather(q: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None):
+        def build():
+            place = _located(q, lat, lon)
+            return current_payload(place, int(time.time())) if place else None
+        return await upstream("weather", build)
+
+    @app.get("/data/2.5/forecast")
+    async def forecast(q: Optional[str] = None, lat: Optional[float] = None, lon: Optional[float] = None):
+        def build():
+            place = _located(q, lat, lon)
+            return forecast_payload(place, int(time.time())) if place else None
+        return await upstream("forecast", build)
+
+    @app.get("/data/3.0/onecall")
+    async def onecall(lat: float, lon: float):
+        return await upstream("onecall", lambda: onecall_payload(lat, lon, int(time.time())))
+
+    @app.get("/geo/1.0/direct")
+    async def geocoding(q: str, limit: int = 5):
+        def build():
+            if UNKNOWN_MARKER in q.lower():
+                return []
+            place = _place(q, None, None)
+            return [{**place, "state": None}][:limit]
+        return await upstream("geocoding", build)
+
+    @app.get("/__stats")
+    async def stats():
+        return {"calls": dict(calls), "total_calls": sum(calls.values()), "injected": dict(injected), "config": config}
+
+    @app.post("/__reset")
+    async def reset():
+        calls.clear()
+        injected.clear()
+        return {"ok": True}
+
+    @app.post("/__config")
+    async def configure(request: Request):
+        updates = await request.json()
+        config.update({k: float(v) for k, v in updates.items() if k in config})
+        return config
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_mock_app(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
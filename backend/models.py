@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Literal
 from datetime import datetime
 
 class WeatherData(BaseModel):
@@ -24,8 +24,11 @@ class ForecastDay(BaseModel):
     day: str = Field(..., description="Day name")
     high: int = Field(..., description="High temperature in Celsius")
     low: int = Field(..., description="Low temperature in Celsius")
-    condition: str = Field(..., description="Weather condition")
-    description: str = Field(..., description="Weather description")
+    mean: Optional[int] = Field(None, description="Mean temperature in Celsius")
+    precipitation: Optional[float] = Field(None, description="Total rain and snow in mm")
+    windMax: Optional[int] = Field(None, description="Maximum wind speed in km/h")
+    condition: str = Field(..., description="Dominant weather condition")
+    description: str = Field(..., description="Dominant weather description")
 
 class CitySearchResult(BaseModel):
     """City search result model"""
@@ -62,3 +65,68 @@ class HealthResponse(BaseModel):
     timestamp: str = Field(..., description="Check timestamp")
     version: str = Field(..., description="API version")
     uptime: Optional[float] = Field(None, description="Service uptime in seconds")
+
+class BatchItem(BaseModel):
+    """A single city or point in a batch weather request"""
+    city: Optional[str] = Field(None, min_length=1, description="City name")
+    country_code: Optional[str] = Field(None, description="Country code (e.g., US, GB)")
+    lat: Optional[float] = Field(None, ge=-90, le=90, description="Latitude (use with lon instead of city)")
+    lon: Optional[float] = Field(None, ge=-180, le=180, description="Longitude (use with lat instead of city)")
+    kinds: List[Literal["current", "forecast"]] = Field(
+        default_factory=lambda: ["current", "forecast"],
+        min_length=1,
+        description="Which data to fetch for the city"
+    )
+
+    @model_validator(mode="after")
+    def check_location(self):
+        if self.city is None and (self.lat is None or self.lon is None):
+            raise ValueError("Either city or both lat and lon are required")
+        return self
+
+class BatchRequest(BaseModel):
+    """Batch weather request for many cities"""
+    items: List[BatchItem] = Field(..., min_length=1, max_length=100, description="Cities to fetch")
+
+class BatchItemError(BaseModel):
+    """Error for one kind of data in a batch item"""
+    status: int = Field(..., description="HTTP status the single-city endpoint would return")
+    detail: str = Field(..., description="Error message")
+
+class BatchItemResult(BaseModel):
+    """Per-city result of a batch weather request"""
+    index: int = Field(..., description="Position of the item in the request")
+    city: Optional[str] = Field(None, description="Requested city name")
+    country_code: Optional[str] = Field(None, description="Requested country code")
+    lat: Optional[float] = Field(None, description="Requested latitude")
+    lon: Optional[float] = Field(None, description="Requested longitude")
+    current: Optional[WeatherData] = Field(None, description="Current weather")
+    forecast: Optional[List[ForecastDay]] = Field(None, description="5-day forecast")
+    errors: Dict[str, BatchItemError] = Field(default_factory=dict, description="Errors keyed by kind")
+
+class BatchResponse(BaseModel):
+    """Batch weather response"""
+    results: List[BatchItemResult] = Field(..., description="Results in request order")
+    timestamp: str = Field(..., description="Response timestamp")
+
+class HistoryPoint(BaseModel):
+    """One observation, or an hourly/daily rollup of observations"""
+    time: int = Field(..., description="Unix time of the observation or start of the bucket")
+    temperature: Optional[float] = Field(None, description="Temperature (bucket mean) in Celsius")
+    feelsLike: Optional[float] = Field(None, description="Feels like temperature in Celsius (raw only)")
+    humidity: Optional[float] = Field(None, description="Humidity percentage (bucket mean)")
+    pressure: Optional[float] = Field(None, description="Atmospheric pressure in hPa (bucket mean)")
+    windSpeed: Optional[float] = Field(None, description="Wind speed in km/h (bucket mean)")
+    condition: Optional[str] = Field(None, description="Weather condition (raw only)")
+    samples: Optional[int] = Field(None, description="Observations in the bucket (rollups only)")
+    temperatureMin: Optional[float] = Field(None, description="Lowest temperature in the bucket")
+    temperatureMax: Optional[float] = Field(None, description="Highest temperature in the bucket")
+    windMax: Optional[float] = Field(None, description="Highest wind speed in the bucket")
+
+class HistoryResponse(BaseModel):
+    """Recorded weather history for one location"""
+    location: str = Field(..., description="Requested city or lat,lon")
+    resolution: Literal["raw", "hour", "day"] = Field(..., description="Point resolution")
+    start: int = Field(..., description="Range start (Unix time)")
+    end: int = Field(..., description="Range end (Unix time, exclusive)")
+    points: List[HistoryPoint] = Field(..., description="Points in time order")
@@ -0,0 +1,356 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import List, Literal, Optional
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from models import (
+    BatchItem, BatchRequest, BatchResponse, CitySearchResult, ForecastDay, HealthResponse, HistoryResponse, WeatherData
+)
+from services.errors import InvalidLocation, LocationNotFound, UpstreamUnavailable
+from services.http_cache import cached_response
+from services.location_input import clean_city, clean_location
+from services.metrics import ERRORS, REGISTRY
+from services.push import TooManySubscribers
+from services.request_log import log_sampled
+from services.serialization import dumps, encode_body, json_response
+from services.weather_backend import WeatherBackend
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def get_backend(request: Request) -> WeatherBackend:
+    """The app's WeatherBackend, created by its lifespan (async, so no threadpool hop per request)"""
+    return request.app.state.backend
+
+
+def _require_api_key(backend: WeatherBackend) -> None:
+    if not backend.settings.openweather_api_key:
+        raise HTTPException(status_code=500, detail="OpenWeather API key not configured")
+
+
+def _location_label(city: Optional[str], lat: Optional[float], lon: Optional[float]) -> str:
+    return city if city else f"{lat},{lon}"
+
+
+def _http_error(e: Exception, city: str) -> HTTPException:
+    """Map a weather lookup failure to the HTTP error returned to clients"""
+    error = _map_error(e, city)
+    ERRORS.inc(error=type(e).__name__, status=error.status_code)
+    return error
+
+
+def _map_error(e: Exception, city: str) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, InvalidLocation):
+        return HTTPException(status_code=422, detail=str(e))
+    if isinstance(e, LocationNotFound):
+        return HTTPException(status_code=404, detail=f"City '{city}' not found")
+    if isinstance(e, UpstreamUnavailable):
+        logger.warning("Upstream unavailable for %s: %s", city, e)
+        headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after is not None else None
+        return HTTPException(status_code=503, detail="Weather service temporarily unavailable", headers=headers)
+    if isinstance(e, httpx.TimeoutException):
+        logger.error("OpenWeather timed out for %s: %s", city, e)
+        return HTTPException(status_code=504, detail="Weather service timed out")
+    if isinstance(e, httpx.TransportError) or (
+        isinstance(e, httpx.HTTPStatusError) and e.response.status_code >= 500
+    ):
+        logger.error("OpenWeather failed for %s: %s", city, e)
+        return HTTPException(status_code=502, detail="Weather service error")
+    if isinstance(e, ValueError):
+        if "not found" in str(e).lower():
+            return HTTPException(status_code=404, detail=f"City '{city}' not found")
+        logger.error("Validation error: %s", e)
+        return HTTPException(status_code=500, detail=str(e))
+    logger.error("Unexpected error: %s", e)
+    return HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/")
+async def root():
+    """Root endpoint"""
+    return {"message": "Weather Dashboard API", "status": "running"}
+
+
+@router.get("/health", response_model=HealthResponse)
+async def health_check(request: Request, backend: WeatherBackend = Depends(get_backend)):
+    """Health check endpoint"""
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "version": request.app.version,
+        "uptime": round(time.monotonic() - backend.started_at, 3)
+    }
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics in the text exposition format"""
+    return Response(content=REGISTRY.render(), media_type=REGISTRY.CONTENT_TYPE)
+
+
+@router.get("/stats")
+async def get_stats(request: Request, backend: WeatherBackend = Depends(get_backend)):
+    """Runtime statistics for sizing the upstream connection pool and caches (of the worker that answers)"""
+    return {
+        **backend.stats(),
+        "admission": request.app.state.admission.stats(),
+        "worker": os.getpid(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@router.get("/weather/current", response_model=WeatherData)
+async def get_current_weather(
+    request: Request,
+    city: Optional[str] = Query(None, description="City name"),
+    country_code: Optional[str] = Query(None, description="Country code (e.g., US, GB)"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude (use with lon instead of city)"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitude (use with lat instead of city)"),
+    backend: WeatherBackend = Depends(get_backend)
+):
+    """Get current weather for a city or a lat/lon point"""
+    if not city and (lat is None or lon is None):
+        raise HTTPException(status_code=422, detail="Provide either city or both lat and lon")
+
+    location = _location_label(city, lat, lon)
+    try:
+        _require_api_key(backend)
+
+        entry = await backend.load_weather("current", city, country_code, lat=lat, lon=lon, encode=True)
+
+        log_sampled(logger, "served", route="current", location=location)
+        return cached_response(request, entry)
+
+    except Exception as e:
+        raise _http_error(e, location)
+
+
+@router.get("/weather/forecast", response_model=List[ForecastDay])
+async def get_weather_forecast(
+    request: Request,
+    city: Optional[str] = Query(None, description="City name"),
+    country_code: Optional[str] = Query(None, description="Country code (e.g., US, GB)"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude (use with lon instead of city)"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitude (use with lat instead of city)"),
+    backend: WeatherBackend = Depends(get_backend)
+):
+    """Get 5-day weather forecast for a city or a lat/lon point"""
+    if not city and (lat is None or lon is None):
+        raise HTTPException(status_code=422, detail="Provide either city or both lat and lon")
+
+    location = _location_label(city, lat, lon)
+    try:
+        _require_api_key(backend)
+
+        entry = await backend.load_weather("forecast", city, country_code, lat=lat, lon=lon, encode=True)
+
+        log_sampled(logger, "served", route="forecast", location=location)
+        return cached_response(request, entry)
+
+    except Exception as e:
+        raise _http_error(e, location)
+
+
+@router.get("/weather/history", response_model=HistoryResponse)
+async def get_weather_history(
+    city: Optional[str] = Query(None, description="City name"),
+    country_code: Optional[str] = Query(None, description="Country code (e.g., US, GB)"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude (use with lon instead of city)"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitude (use with lat instead of city)"),
+    days: int = Query(7, ge=1, le=365, description="Days back from end (ignored when start is given)"),
+    start: Optional[datetime] = Query(None, description="Range start (ISO 8601)"),
+    end: Optional[datetime] = Query(None, description="Range end (ISO 8601, default now)"),
+    resolution: Literal["raw", "hour", "day"] = Query("hour", description="Individual observations or hourly/daily rollups"),
+    backend: WeatherBackend = Depends(get_backend)
+):
+    """Recorded weather for a city or a lat/lon point, streamed oldest first"""
+    if not city and (lat is None or lon is None):
+        raise HTTPException(status_code=422, detail="Provide either city or both lat and lon")
+    if backend.history is None:
+        raise HTTPException(status_code=404, detail="Weather history is not enabled")
+    try:
+        city, country_code = clean_location(city or None, country_code)
+    except InvalidLocation as e:
+        raise _http_error(e, _location_label(city, lat, lon))
+
+    end_ts = int(end.timestamp()) if end is not None else int(time.time()) + 1
+    start_ts = int(start.timestamp()) if start is not None else end_ts - days * 86400
+    if start_ts >= end_ts:
+        raise HTTPException(status_code=422, detail="start must be before end")
+
+    points = backend.history.query(backend.cache_key(city, country_code, lat, lon), start_ts, end_ts, resolution)
+    header = {"location": _location_label(city, lat, lon), "resolution": resolution, "start": start_ts, "end": end_ts}
+
+    async def body():
+        # One JSON document, written a chunk of points at a time
+        yield dumps(header)[:-1] + b',"points":['
+        separator = b""
+        async for chunk in points:
+            yield separator + b",".join(dumps(point) for point in chunk)
+            separator = b","
+        yield b"]}"
+
+    log_sampled(logger, "history", location=header["location"], resolution=resolution)
+    return StreamingResponse(body(), media_type="application/json")
+
+
+async def _batch_item(backend: WeatherBackend, index: int, item: BatchItem, limiter: asyncio.Semaphore) -> dict:
+    """Fetch every requested kind for one batch item, collecting errors per kind"""
+    result = {
+        "index": index,
+        "city": item.city,
+        "country_code": item.country_code,
+        "lat": item.lat,
+        "lon": item.lon,
+        "errors": {}
+    }
+    kinds = list(dict.fromkeys(item.kinds))
+    outcomes = await asyncio.gather(
+        *(backend.load_weather(kind, item.city, item.country_code, limiter, item.lat, item.lon) for kind in kinds),
+        return_exceptions=True
+    )
+    for kind, outcome in zip(kinds, outcomes):
+        if isinstance(outcome, Exception):
+            error = _http_error(outcome, _location_label(item.city, item.lat, item.lon))
+            result["errors"][kind] = {"status": error.status_code, "detail": error.detail}
+        else:
+            result[kind] = outcome.value
+    return result
+
+
+@router.post("/weather/batch", response_model=BatchResponse)
+async def get_weather_batch(
+    request: Request,
+    batch: BatchRequest,
+    stream: bool = Query(False, description="Stream results as NDJSON as each city completes"),
+    backend: WeatherBackend = Depends(get_backend)
+):
+    """Get current weather and/or forecast for many cities in one request"""
+    _require_api_key(backend)
+
+    limiter = asyncio.Semaphore(backend.settings.batch_concurrency)
+    tasks = [_batch_item(backend, i, item, limiter) for i, item in enumerate(batch.items)]
+
+    if stream:
+        async def ndjson():
+            for next_result in asyncio.as_completed(tasks):
+                yield dumps(await next_result) + b"\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    results = await asyncio.gather(*tasks)
+    log_sampled(logger, "batch_completed", items=len(results))
+    return json_response(request, encode_body({"results": results, "timestamp": datetime.now().isoformat()}))
+
+
+def _push_loader(backend: WeatherBackend, city: str, country_code: Optional[str]):
+    """Topic loader for one followed city: both kinds, versioned by when each was fetched
+
+    The payload is shared by every connection following the same place, so it
+    carries no city label; each connection adds its own.
+    """
+    async def load():
+        outcomes = await asyncio.gather(
+            backend.load_weather("current", city, country_code),
+            backend.load_weather("forecast", city, country_code),
+            return_exceptions=True
+        )
+        payload = {"errors": {}}
+        version = []
+        for kind, outcome in zip(("current", "forecast"), outcomes):
+            if isinstance(outcome, Exception):
+                error = _http_error(outcome, city)
+                payload["errors"][kind] = {"status": error.status_code, "detail": error.detail}
+                version.append(error.status_code)
+            else:
+                payload[kind] = outcome.value
+                version.append(outcome.stored_at)
+        return tuple(version), payload
+    return load
+
+
+@router.get("/weather/stream")
+async def stream_weather(
+    city: List[str] = Query(..., description="City to follow, optionally as 'City,CC'; repeat for several cities"),
+    backend: WeatherBackend = Depends(get_backend)
+):
+    """Server-Sent Events carrying current weather and forecast for each city whenever they change"""
+    _require_api_key(backend)
+    max_cities = backend.settings.push_max_cities
+    if len(city) > max_cities:
+        raise HTTPException(status_code=422, detail=f"At most {max_cities} cities per connection")
+
+    topics = {}
+    labels = {}
+    for value in city:
+        try:
+            name, country_code = clean_location(value, None)
+        except InvalidLocation as e:
+            raise _http_error(e, value)
+        topic = backend.cache_key(name, country_code)
+        topics[topic] = _push_loader(backend, name, country_code)
+        # Echo the city exactly as sent, once per spelling, so the client can match events to what it asked for
+        label = {"city": value, "country_code": country_code}
+        if label not in labels.setdefault(topic, []):
+            labels[topic].append(label)
+
+    try:
+        subscription = backend.push.subscribe(topics, labels)
+    except TooManySubscribers as e:
+        logger.warning("Rejected push connection: %s", e)
+        raise HTTPException(status_code=503, detail="Too many push connections", headers={"Retry-After": "30"})
+
+    return StreamingResponse(
+        backend.push.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/weather/search", response_model=List[CitySearchResult])
+async def search_cities(
+    query: str = Query(..., description="City search query"),
+    limit: int = Query(5, ge=1, le=10, description="Maximum number of results"),
+    backend: WeatherBackend = Depends(get_backend)
+):
+    """Search for cities by name"""
+    try:
+        query = clean_city(query)
+
+        # Answer from the local gazetteer; only go upstream when it has no match
+        if backend.city_index is not None:
+            results = backend.city_index.search(query, limit)
+            if results:
+                log_sampled(logger, "search", query=query, results=len(results), source="index")
+                return results
+
+        _require_api_key(backend)
+
+        results = await backend.search_cities(query, limit)
+
+        log_sampled(logger, "search", query=query, results=len(results), source="upstream")
+        return results
+
+    except HTTPException:
+        raise
+
+    except (InvalidLocation, UpstreamUnavailable) as e:
+        raise _http_error(e, query)
+
+    except httpx.HTTPStatusError as e:
+        logger.error("OpenWeather geocoding API error: %s", e)
+        raise HTTPException(status_code=500, detail="City search service unavailable")
+
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Production entry point for the Weather Dashboard Backend
+
+Runs one uvicorn worker process per available core, with uvloop and
+httptools when they are installed, and without auto-reload. On SIGTERM each
+worker stops accepting connections, lets in-flight requests finish for up to
+SERVER_GRACEFUL_TIMEOUT seconds, then drains in-flight upstream calls and
+flushes the cache snapshot and history before exiting.
+
+Usage (from the backend directory):
+    python serve.py
+    WEB_CONCURRENCY=4 SERVER_BACKLOG=4096 SERVER_KEEPALIVE=120 python serve.py
+
+Use run.py for development with auto-reload.
+"""
+
+import importlib.util
+import math
+import os
+from typing import Any, Dict, Optional
+
+import uvicorn
+from dotenv import load_dotenv
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of the container in cores (cgroup v2, then v1), or None if unlimited"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        return int(quota) / int(period) if quota != "max" else None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 and period > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """Cores this process may run on, capped by a container CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS and Windows
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options() -> Dict[str, Any]:
+    """uvicorn settings from the environment"""
+    return {
+        "host": os.getenv("BACKEND_HOST", "0.0.0.0"),
+        # Render and most PaaS set PORT
+        "port": int(os.getenv("PORT", os.getenv("BACKEND_PORT", 8000))),
+        "workers": int(os.getenv("WEB_CONCURRENCY", 0)) or available_cpus(),
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "backlog": int(os.getenv("SERVER_BACKLOG", 2048)),
+        # Above the usual 60s load balancer idle timeout, so it never reuses a connection we closed
+        "timeout_keep_alive": int(os.getenv("SERVER_KEEPALIVE", 75)),
+        "timeout_graceful_shutdown": int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30)),
+        # Requests are logged (sampled) by the app; a line per request costs throughput
+        "access_log": os.getenv("SERVER_ACCESS_LOG", "false").lower() in ("1", "true", "yes"),
+        "proxy_headers": True,
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+    }
+
+
+def main():
+    load_dotenv()
+    options = server_options()
+    # Workers inherit this and split the per-API-key upstream budget between them
+    os.environ["WEB_CONCURRENCY"] = str(options["workers"])
+    print(f"🚀 Starting Weather Dashboard Backend on {options['host']}:{options['port']}")
+    print(f"   Workers: {options['workers']}, loop: {options['loop']}, http: {options['http']}")
+    print(f"   Backlog: {options['backlog']}, keep-alive: {options['timeout_keep_alive']}s, "
+          f"graceful shutdown: {options['timeout_graceful_shutdown']}s")
+    uvicorn.run("main:create_app", factory=True, **options)
+
+
+if __name__ == "__main__":
+    main()
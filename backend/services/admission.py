@@ -0,0 +1,127 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Sequence
+
+from services.serialization import dumps
+
+
+class AdmissionController:
+    """Per-worker cap on requests being handled at once
+
+    Up to `max_in_flight` requests run concurrently. A short burst beyond
+    that waits in a queue of at most `max_queue` for up to `queue_timeout`
+    seconds; anything else is rejected at once, so an overloaded worker
+    answers 503 in microseconds instead of letting latency grow without
+    bound.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int = 0, queue_timeout: float = 0.5):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting briefly if allowed; False means the request should be rejected"""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue or self.queue_timeout <= 0:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # The client went away while queued; pass on a slot handed over meanwhile
+            if not self._abandon(waiter):
+                self.release()
+            raise
+        if self._abandon(waiter):
+            self.rejected += 1
+            return False
+        # release() handed its slot over; in_flight already counts this request
+        self.admitted += 1
+        return True
+
+    def _abandon(self, waiter: asyncio.Future) -> bool:
+        """Leave the queue; False if a slot was already handed to this waiter"""
+        if waiter.done():
+            return False
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued_now": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware enforcing an AdmissionController with a fast 503 and Retry-After
+
+    Health checks, metrics and long-lived push streams (which have their own
+    connection cap) bypass the limit.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        exclude: Sequence[str] = ("/health", "/metrics", "/weather/stream"),
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.controller = controller
+        self.exclude = set(exclude)
+        self.retry_after = retry_after
+        self._body = dumps({"detail": "Server is busy, retry shortly"})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.controller.max_in_flight <= 0 or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(self._body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": self._body})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
@@ -0,0 +1,351 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default freshness (soft TTL) per namespace, in seconds
+DEFAULT_TTLS = {
+    "current": 600,
+    "forecast": 1800,
+    "search": 3600,
+    # Locations OpenWeather answered 404 for; short, so a newly listed city is not hidden for long
+    "notfound": 300,
+}
+
+# How long past the soft TTL a stale value may still be served while it is
+# refreshed in the background; soft TTL + grace is the hard TTL
+DEFAULT_STALE_TTLS = {
+    "current": 600,
+    "forecast": 1800,
+    "search": 3600,
+    "notfound": 0,
+}
+
+# How long past the hard TTL an expired entry is kept as a last resort for when
+# OpenWeather cannot be called at all; a day outlasts a spent daily budget
+DEFAULT_LAST_RESORT_TTL = 86400
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    """A cached value together with its soft and hard expiry times"""
+    value: Any
+    stored_at: float
+    stale_at: float
+    expires_at: float
+    size: int = 0
+    # Encoded response bytes (see services.serialization), produced on first use
+    body: Optional[Any] = field(default=None, compare=False)
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) >= self.stale_at
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) >= self.expires_at
+
+
+class CacheBackend:
+    """Interface shared by every cache backend (in-memory, Redis)"""
+
+    def __init__(self, ttls: Optional[Dict[str, int]] = None, stale_ttls: Optional[Dict[str, int]] = None):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale_ttls = {**DEFAULT_STALE_TTLS, **(stale_ttls or {})}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, namespace: str) -> int:
+        return self.ttls.get(namespace, DEFAULT_TTLS["current"])
+
+    def stale_ttl_for(self, namespace: str) -> int:
+        return self.stale_ttls.get(namespace, 0)
+
+    def _new_entry(self, namespace: str, value: Any, ttl: Optional[int], stale_ttl: Optional[int], size: int = 0) -> CacheEntry:
+        now = time.time()
+        stale_at = now + (ttl if ttl is not None else self.ttl_for(namespace))
+        grace = stale_ttl if stale_ttl is not None else self.stale_ttl_for(namespace)
+        return CacheEntry(value=value, stored_at=now, stale_at=stale_at, expires_at=stale_at + grace, size=size)
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return the cached value if it is still fresh, otherwise None"""
+        entry = await self.get_entry(namespace, key)
+        if entry is None or entry.is_stale():
+            return None
+        return entry.value
+
+    async def get_entry(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        """Return the entry (fresh or stale), or None once past its hard TTL"""
+        raise NotImplementedError
+
+    async def contains(self, namespace: str, key: str) -> bool:
+        """True if a fresh entry exists; not counted as a hit or miss (for bookkeeping such as negative caching)"""
+        raise NotImplementedError
+
+    async def last_resort(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        """An entry kept past its hard TTL, for when it cannot be reloaded; not counted as a hit or miss"""
+        return None
+
+    async def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ) -> CacheEntry:
+        """Store a value, using the namespace TTLs unless they are given, and return its entry"""
+        raise NotImplementedError
+
+    def resize(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        """Re-count a stored entry against the byte bound after its encoded body is attached"""
+
+    async def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    @asynccontextmanager
+    async def fill_lock(self, namespace: str, key: str) -> AsyncIterator[bool]:
+        """Held while a key is loaded; yields False if another process filled it meanwhile
+
+        In-process callers are already coalesced by SingleFlight, so the
+        default lock is always acquired. Shared backends override this to
+        coordinate loads across workers.
+        """
+        yield True
+
+    async def start(self) -> None:
+        """Start any background work (sweepers, connections)"""
+
+    async def stop(self) -> None:
+        """Stop background work and release resources"""
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache bounded by entry count and/or approximate byte size"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = 10000,
+        max_bytes: Optional[int] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        stale_ttls: Optional[Dict[str, int]] = None,
+        sweep_interval: float = 60.0,
+        last_resort_ttl: float = DEFAULT_LAST_RESORT_TTL,
+    ):
+        super().__init__(ttls, stale_ttls)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.last_resort_ttl = last_resort_ttl
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        """Approximate the memory cost of a value by its JSON-encoded length"""
+        return len(json.dumps(value, default=str, separators=(",", ":")))
+
+    def _entry_size(self, entry: CacheEntry) -> int:
+        """The value plus its encoded response bodies, once they are attached"""
+        return self._sizeof(entry.value) + (entry.body.size if entry.body is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _past_last_resort(self, entry: CacheEntry, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) >= entry.expires_at + self.last_resort_ttl
+
+    async def get_entry(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        full_key = self._key(namespace, key)
+        entry = self._entries.get(full_key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.is_expired():
+            # Kept for last_resort() until the LRU bounds or the sweeper drop it
+            if self._past_last_resort(entry):
+                self._remove(full_key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(full_key)
+        if entry.is_stale():
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ) -> CacheEntry:
+        size = self._sizeof(value) if self.max_bytes else 0
+        return self.set_entry(namespace, key, self._new_entry(namespace, value, ttl, stale_ttl, size))
+
+    def set_entry(self, namespace: str, key: str, entry: CacheEntry) -> CacheEntry:
+        """Store an entry built elsewhere (e.g. read from a shared tier), keeping its timestamps"""
+        full_key = self._key(namespace, key)
+        if self.max_bytes and not entry.size:
+            entry.size = self._entry_size(entry)
+        if full_key in self._entries:
+            self._remove(full_key)
+        self._entries[full_key] = entry
+        self.total_bytes += entry.size
+        self._evict()
+        return entry
+
+    async def contains(self, namespace: str, key: str) -> bool:
+        entry = self.peek(namespace, key)
+        return entry is not None and not entry.is_stale()
+
+    async def last_resort(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        entry = self.peek(namespace, key)
+        if entry is None or self._past_last_resort(entry):
+            return None
+        return entry
+
+    def resize(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        if not self.max_bytes or self.peek(namespace, key) is not entry:
+            return
+        size = self._entry_size(entry)
+        self.total_bytes += size - entry.size
+        entry.size = size
+        self._evict()
+
+    def peek(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        """Return the stored entry without touching LRU order or hit counters"""
+        return self._entries.get(self._key(namespace, key))
+
+    def items(self) -> Iterator[Tuple[str, str, CacheEntry]]:
+        """Yield (namespace, key, entry) from least to most recently used"""
+        for full_key, entry in list(self._entries.items()):
+            namespace, _, key = full_key.partition(":")
+            yield namespace, key, entry
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self._remove(self._key(namespace, key))
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def _remove(self, full_key: str) -> None:
+        entry = self._entries.pop(full_key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until both bounds are satisfied"""
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+
+    def sweep(self) -> int:
+        """Remove every entry past its last-resort window and return how many were dropped"""
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if self._past_last_resort(entry, now)]
+        for full_key in expired:
+            self._remove(full_key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            removed = self.sweep()
+            if removed:
+                logger.debug("Cache sweeper removed %d expired entries", removed)
+
+    async def start(self) -> None:
+        if self._sweeper is None and self.sweep_interval > 0:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        })
+        return stats
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def create_cache() -> CacheBackend:
+    """Build the cache backend selected by CACHE_BACKEND"""
+    ttls = {
+        namespace: int(os.getenv(f"CACHE_TTL_{namespace.upper()}", default))
+        for namespace, default in DEFAULT_TTLS.items()
+    }
+    stale_ttls = {
+        namespace: int(os.getenv(f"CACHE_STALE_TTL_{namespace.upper()}", default))
+        for namespace, default in DEFAULT_STALE_TTLS.items()
+    }
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+
+    if backend in ("memory", "redis"):
+        memory = MemoryCache(
+            max_entries=_env_int("CACHE_MAX_ENTRIES") or 10000,
+            max_bytes=_env_int("CACHE_MAX_BYTES"),
+            ttls=ttls,
+            stale_ttls=stale_ttls,
+            sweep_interval=float(os.getenv("CACHE_SWEEP_INTERVAL", 60)),
+            last_resort_ttl=float(os.getenv("CACHE_LAST_RESORT_TTL", DEFAULT_LAST_RESORT_TTL)),
+        )
+        if backend == "memory":
+            return memory
+        # Imported here because redis_cache builds on this module
+        from services.redis_cache import create_tiered_cache
+        return create_tiered_cache(memory)
+
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.cache import CacheBackend, CacheEntry, MemoryCache
+from services.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache_snapshot.db")
+
+# Rows restored per batch before yielding to the event loop
+_RESTORE_BATCH = 500
+
+Row = Tuple[str, str, float, float, float, bytes]
+
+
+def _write_snapshot(path: str, rows: List[Row]) -> None:
+    """Write rows to a fresh SQLite file and atomically swap it into place"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute(
+            "CREATE TABLE entries (namespace TEXT, key TEXT, stored_at REAL, stale_at REAL, expires_at REAL, value BLOB)"
+        )
+        conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot(path: str, now: float) -> List[Row]:
+    """Rows still within their hard TTL, oldest use first"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute(
+            "SELECT namespace, key, stored_at, stale_at, expires_at, value FROM entries WHERE expires_at > ? ORDER BY rowid",
+            (now,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+class CacheSnapshotter:
+    """Persist the in-process cache to a local SQLite file so restarts come up warm
+
+    A snapshot is written every `interval` seconds and on shutdown. On
+    startup the previous snapshot is restored in the background, so the app
+    starts serving immediately; entries past their hard TTL are skipped and
+    keys that were already fetched again are not overwritten.
+    """
+
+    def __init__(self, cache: MemoryCache, path: str, interval: float = 300.0):
+        self.cache = cache
+        self.path = path
+        self.interval = interval
+        self._tasks: List[asyncio.Task] = []
+
+        self.saved = 0
+        self.restored = 0
+        self.last_saved_at: Optional[float] = None
+        self.save_failures = 0
+
+    async def save(self) -> int:
+        """Write every unexpired entry to the snapshot file and return how many were written"""
+        now = time.time()
+        rows = [
+            (namespace, key, entry.stored_at, entry.stale_at, entry.expires_at, dumps(entry.value))
+            for namespace, key, entry in self.cache.items()
+            if not entry.is_expired(now)
+        ]
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, _write_snapshot, self.path, rows)
+        except (sqlite3.Error, OSError) as e:
+            self.save_failures += 1
+            logger.warning("Cache snapshot to %s failed: %s", self.path, e)
+            return 0
+        self.saved = len(rows)
+        self.last_saved_at = now
+        return len(rows)
+
+    async def restore(self) -> int:
+        """Load unexpired entries from the last snapshot and return how many were restored"""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            rows = await asyncio.get_running_loop().run_in_executor(None, _read_snapshot, self.path, time.time())
+        except sqlite3.Error as e:
+            logger.warning("Ignoring unreadable cache snapshot %s: %s", self.path, e)
+            return 0
+
+        restored = 0
+        for i, (namespace, key, stored_at, stale_at, expires_at, value) in enumerate(rows):
+            if self.cache.peek(namespace, key) is None:
+                entry = CacheEntry(value=loads(value), stored_at=stored_at, stale_at=stale_at, expires_at=expires_at)
+                self.cache.set_entry(namespace, key, entry)
+                restored += 1
+            if i % _RESTORE_BATCH == _RESTORE_BATCH - 1:
+                await asyncio.sleep(0)
+        self.restored += restored
+        logger.info("Restored %d cache entries from %s", restored, self.path)
+        return restored
+
+    async def _save_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self.restore()))
+        if self.interval > 0:
+            self._tasks.append(asyncio.create_task(self._save_loop()))
+
+    async def stop(self) -> None:
+        """Stop the periodic task and write a final snapshot"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        saved = await self.save()
+        logger.info("Saved %d cache entries to %s", saved, self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "saved": self.saved,
+            "restored": self.restored,
+            "last_saved_at": self.last_saved_at,
+            "save_failures": self.save_failures,
+        }
+
+
+def create_snapshotter(cache: CacheBackend) -> Optional[CacheSnapshotter]:
+    """Build the snapshotter from CACHE_SNAPSHOT_PATH; an empty path disables snapshots"""
+    path = os.getenv("CACHE_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+    if not path:
+        return None
+    # With the Redis backend only the in-process L1 is snapshotted
+    memory = getattr(cache, "l1", cache)
+    if not isinstance(memory, MemoryCache):
+        return None
+    return CacheSnapshotter(memory, path, interval=float(os.getenv("CACHE_SNAPSHOT_INTERVAL", 300)))
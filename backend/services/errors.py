@@ -0,0 +1,21 @@
+from typing import Optional
+
+
+class UpstreamUnavailable(Exception):
+    """OpenWeather cannot be called right now; callers should retry later"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaExceeded(UpstreamUnavailable):
+    """The per-minute or per-day OpenWeather call budget is exhausted"""
+
+
+class LocationNotFound(Exception):
+    """OpenWeather does not know the requested location"""
+
+
+class InvalidLocation(ValueError):
+    """City or country input that cannot name a place; rejected without an upstream call"""
@@ -0,0 +1,125 @@
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+SECONDS_PER_DAY = 86400
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _precipitation(item: Dict[str, Any]) -> float:
+    return item.get("rain", {}).get("3h", 0.0) + item.get("snow", {}).get("3h", 0.0)
+
+
+def _dominant(counts: Dict[str, int]) -> str:
+    """Most frequent key; ties go to the one seen first"""
+    return max(counts, key=counts.__getitem__)
+
+
+def _day_label(day: date, today: int) -> str:
+    local_day = day.toordinal() - _EPOCH_ORDINAL
+    if local_day == today:
+        return "Today"
+    if local_day == today + 1:
+        return "Tomorrow"
+    return _WEEKDAYS[day.weekday()]
+
+
+def _group_by_local_day(items: List[Dict[str, Any]], offset: int, days: int) -> List[Dict[str, Any]]:
+    """Single pass over the 3-hourly points, keeping running aggregates per local day"""
+    groups: Dict[int, Dict[str, Any]] = {}
+    for item in items:
+        local_day = (item["dt"] + offset) // SECONDS_PER_DAY
+        group = groups.get(local_day)
+        if group is None:
+            if len(groups) == days:
+                break
+            group = groups[local_day] = {
+                "day": local_day,
+                "count": 0,
+                "temp_sum": 0.0,
+                "high": float("-inf"),
+                "low": float("inf"),
+                "precipitation": 0.0,
+                "wind_max": 0.0,
+                "conditions": {},
+                "descriptions": {},
+            }
+
+        temp = item["main"]["temp"]
+        weather = item["weather"][0]
+        condition = weather["main"].lower()
+        description = weather["description"]
+
+        group["count"] += 1
+        group["temp_sum"] += temp
+        if temp > group["high"]:
+            group["high"] = temp
+        if temp < group["low"]:
+            group["low"] = temp
+        group["precipitation"] += _precipitation(item)
+        wind = item.get("wind", {}).get("speed", 0.0)
+        if wind > group["wind_max"]:
+            group["wind_max"] = wind
+        group["conditions"][condition] = group["conditions"].get(condition, 0) + 1
+        group["descriptions"][description] = group["descriptions"].get(description, 0) + 1
+
+    return list(groups.values())
+
+
+def aggregate_forecast(data: Dict[str, Any], days: int = 5, now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Group an OpenWeather 3-hourly forecast into daily summaries in the city's own timezone
+
+    Days are bucketed by the city's UTC offset from the payload rather than
+    the server's local time. Every statistic is computed in O(n).
+    """
+    items = data["list"]
+    if not items:
+        return []
+    offset = data.get("city", {}).get("timezone", 0)
+
+    groups = _group_by_local_day(items, offset, days)
+
+    today = (int(now if now is not None else time.time()) + offset) // SECONDS_PER_DAY
+    summaries = []
+    for group in groups:
+        day = date.fromordinal(_EPOCH_ORDINAL + group["day"])
+        summaries.append({
+            "date": day.isoformat(),
+            "day": _day_label(day, today),
+            "high": round(group["high"]),
+            "low": round(group["low"]),
+            "mean": round(group["temp_sum"] / group["count"]),
+            "precipitation": round(group["precipitation"], 1),
+            "windMax": round(group["wind_max"] * 3.6),  # Convert m/s to km/h
+            "condition": _dominant(group["conditions"]),
+            "description": _dominant(group["descriptions"]),
+        })
+    return summaries
+
+
+def summarize_daily(
+    daily: List[Dict[str, Any]],
+    offset: int = 0,
+    days: int = 5,
+    now: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """Daily summaries from One Call `daily` items, in the same shape as aggregate_forecast"""
+    today = (int(now if now is not None else time.time()) + offset) // SECONDS_PER_DAY
+    summaries = []
+    for item in daily[:days]:
+        day = date.fromordinal(_EPOCH_ORDINAL + (item["dt"] + offset) // SECONDS_PER_DAY)
+        temp = item["temp"]
+        weather = item["weather"][0]
+        summaries.append({
+            "date": day.isoformat(),
+            "day": _day_label(day, today),
+            "high": round(temp["max"]),
+            "low": round(temp["min"]),
+            "mean": round((temp["morn"] + temp["day"] + temp["eve"] + temp["night"]) / 4),
+            "precipitation": round(item.get("rain", 0.0) + item.get("snow", 0.0), 1),
+            "windMax": round(max(item.get("wind_speed", 0.0), item.get("wind_gust", 0.0)) * 3.6),
+            "condition": weather["main"].lower(),
+            "description": weather["description"],
+        })
+    return summaries
@@ -0,0 +1,207 @@
+import csv
+import heapq
+import logging
+import os
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cities.csv")
+
+# Prefixes this short match too many names to rank on every query, so their
+# top results are precomputed at load time
+_PRECOMPUTED_PREFIX_LEN = 2
+_PRECOMPUTED_TOP_K = 10
+
+
+def normalize_name(text: str) -> str:
+    """Case-fold, strip accents and collapse whitespace for matching"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.replace("-", " ").replace("'", "").split())
+
+
+def _deletes(word: str) -> List[str]:
+    """All variants of word with one character removed"""
+    return [word[:i] + word[i + 1:] for i in range(len(word))]
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion, substitution or transposition"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class CityIndex:
+    """Offline city lookup answering prefix and typo-tolerant queries
+
+    Names are kept in one sorted list of normalized keys with parallel compact
+    arrays for coordinates and population, so a prefix query is two binary
+    searches. Typos are handled with a symmetric-delete index that finds every
+    name within one edit of the query without scanning the gazetteer.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str, Optional[str], float, float, int]]):
+        ordered = sorted(
+            ((normalize_name(name), name, country, state, lat, lon, population)
+             for name, country, state, lat, lon, population in rows),
+            key=lambda row: (row[0], -row[6]),
+        )
+        self._keys: List[str] = [row[0] for row in ordered]
+        self._names: List[str] = [row[1] for row in ordered]
+        self._countries: List[str] = [row[2] for row in ordered]
+        self._states: List[Optional[str]] = [row[3] or None for row in ordered]
+        self._lats = array("d", (row[4] for row in ordered))
+        self._lons = array("d", (row[5] for row in ordered))
+        self._populations = array("q", (row[6] for row in ordered))
+
+        self._deletes: Dict[str, List[int]] = {}
+        for i, key in enumerate(self._keys):
+            for variant in {key, *_deletes(key)}:
+                self._deletes.setdefault(variant, []).append(i)
+
+        self._top_by_prefix: Dict[str, List[int]] = {}
+        for length in range(1, _PRECOMPUTED_PREFIX_LEN + 1):
+            prefixes = {key[:length] for key in self._keys if len(key) >= length}
+            for prefix in prefixes:
+                self._top_by_prefix[prefix] = self._rank(self._prefix_range(prefix), _PRECOMPUTED_TOP_K)
+
+        self.local_hits = 0
+        self.local_misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @classmethod
+    def load(cls, path: str) -> "CityIndex":
+        """Load a gazetteer CSV (name,country,state,lat,lon,population) or a GeoNames cities*.txt dump"""
+        with open(path, encoding="utf-8", newline="") as f:
+            if path.endswith(".txt"):
+                rows = list(cls._read_geonames(f))
+            else:
+                rows = [
+                    (row["name"], row["country"], row.get("state") or None,
+                     float(row["lat"]), float(row["lon"]), int(row.get("population") or 0))
+                    for row in csv.DictReader(f)
+                ]
+        index = cls(rows)
+        logger.info("Loaded %d cities into the local geocoding index from %s", len(index), path)
+        return index
+
+    @staticmethod
+    def _read_geonames(f) -> Iterable[Tuple[str, str, Optional[str], float, float, int]]:
+        # GeoNames columns: name=1, lat=4, lon=5, country=8, admin1 code=10, population=14
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15:
+                continue
+            yield cols[1], cols[8], cols[10] or None, float(cols[4]), float(cols[5]), int(cols[14] or 0)
+
+    def _prefix_range(self, prefix: str) -> range:
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + "\uffff", lo=start)
+        return range(start, end)
+
+    def _rank(self, ids: Iterable[int], limit: int) -> List[int]:
+        return heapq.nlargest(limit, ids, key=lambda i: self._populations[i])
+
+    def _fuzzy(self, key: str) -> List[int]:
+        """Ids of names within one edit of key"""
+        candidates = set()
+        for variant in (key, *_deletes(key)):
+            candidates.update(self._deletes.get(variant, ()))
+        return [i for i in candidates if _within_one_edit(key, self._keys[i])]
+
+    def _result(self, i: int) -> Dict[str, Any]:
+        return {
+            "name": self._names[i],
+            "country": self._countries[i],
+            "state": self._states[i],
+            "lat": self._lats[i],
+            "lon": self._lons[i],
+        }
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Cities matching query by prefix, or by one typo if nothing matches, ranked by population
+
+        A trailing ", CC" restricts matches to that country code.
+        """
+        name, _, country = query.partition(",")
+        key = normalize_name(name)
+        country = country.strip().upper() or None
+        if not key:
+            return []
+
+        if country is None and key in self._top_by_prefix:
+            ids = self._top_by_prefix[key][:limit]
+        else:
+            matches = self._prefix_range(key)
+            if country is not None:
+                matches = (i for i in matches if self._countries[i] == country)
+            ids = self._rank(matches, limit)
+
+        # Only fall back to typo matching when the prefix found nothing
+        if not ids and len(key) >= 4:
+            fuzzy = self._fuzzy(key)
+            if country is not None:
+                fuzzy = [i for i in fuzzy if self._countries[i] == country]
+            ids = self._rank(fuzzy, limit)
+
+        if ids:
+            self.local_hits += 1
+        else:
+            self.local_misses += 1
+        return [self._result(i) for i in ids]
+
+    def place(self, city: str, country_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Gazetteer record of the most populous city named exactly `city`, if known"""
+        key = normalize_name(city)
+        country = country_code.strip().upper() if country_code else None
+        start = bisect_left(self._keys, key)
+        best = None
+        for i in range(start, len(self._keys)):
+            if self._keys[i] != key:
+                break
+            if country is not None and self._countries[i] != country:
+                continue
+            if best is None or self._populations[i] > self._populations[best]:
+                best = i
+        if best is None:
+            return None
+        return self._result(best)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cities": len(self._keys),
+            "local_hits": self.local_hits,
+            "local_misses": self.local_misses,
+        }
+
+
+def load_city_index() -> Optional[CityIndex]:
+    """Load the gazetteer named by GEO_INDEX_PATH (bundled by default); empty value disables it"""
+    path = os.getenv("GEO_INDEX_PATH", DEFAULT_GAZETTEER)
+    if not path:
+        return None
+    try:
+        return CityIndex.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error("Could not load geocoding index from %s: %s", path, e)
+        return None
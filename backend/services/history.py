@@ -0,0 +1,275 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "weather_history.db")
+
+# Bucket width in seconds per rollup resolution
+RESOLUTIONS = {"hour": 3600, "day": 86400}
+
+# Rows read per query while streaming a range
+_READ_CHUNK = 500
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS observations (
+        location TEXT NOT NULL, ts INTEGER NOT NULL,
+        temperature REAL, feels_like REAL, humidity REAL, pressure REAL, wind_speed REAL, condition TEXT,
+        PRIMARY KEY (location, ts)
+    ) WITHOUT ROWID""",
+    *(
+        f"""CREATE TABLE IF NOT EXISTS rollup_{resolution} (
+            location TEXT NOT NULL, bucket INTEGER NOT NULL, samples INTEGER NOT NULL,
+            temp_min REAL, temp_max REAL, temp_sum REAL, humidity_sum REAL, pressure_sum REAL,
+            wind_max REAL, wind_sum REAL,
+            PRIMARY KEY (location, bucket)
+        ) WITHOUT ROWID"""
+        for resolution in RESOLUTIONS
+    ),
+]
+
+Observation = Tuple[str, int, Optional[float], Optional[float], Optional[float], Optional[float], Optional[float], Optional[str]]
+
+
+def _observation(location: str, ts: int, current: Dict[str, Any]) -> Observation:
+    return (
+        location, ts, current.get("temperature"), current.get("feelsLike"), current.get("humidity"),
+        current.get("pressure"), current.get("windSpeed"), current.get("condition"),
+    )
+
+
+def _rollup_sql(resolution: str) -> str:
+    # Rollups are maintained incrementally, so a range query never scans raw rows
+    return f"""INSERT INTO rollup_{resolution} VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (location, bucket) DO UPDATE SET
+            samples = samples + 1,
+            temp_min = min(temp_min, excluded.temp_min), temp_max = max(temp_max, excluded.temp_max),
+            temp_sum = temp_sum + excluded.temp_sum, humidity_sum = humidity_sum + excluded.humidity_sum,
+            pressure_sum = pressure_sum + excluded.pressure_sum,
+            wind_max = max(wind_max, excluded.wind_max), wind_sum = wind_sum + excluded.wind_sum"""
+
+
+class HistoryStore:
+    """Append-only SQLite (WAL) store of current-weather observations with hourly and daily rollups
+
+    Observations are buffered in memory and written in one transaction every
+    `flush_interval` seconds, off the event loop. Each write also updates the
+    hourly and daily rollups. Raw rows and rollups are pruned after their own
+    retention period. Readers use separate connections, which WAL lets run
+    alongside the writer, and page through a range in chunks, so memory stays
+    bounded however long the range is.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 5.0,
+        max_buffer: int = 10000,
+        retention_days: Optional[Dict[str, float]] = None,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.retention_days = {"raw": 7, "hour": 30, "day": 365, **(retention_days or {})}
+        self._buffer: Deque[Observation] = deque()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_pruned = 0.0
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_failures = 0
+
+    def record(self, location: str, current: Dict[str, Any], ts: Optional[float] = None) -> None:
+        """Queue one current-weather payload; cheap enough to call on every upstream fetch"""
+        if len(self._buffer) >= self.max_buffer:
+            # The disk is not keeping up; shed the oldest observation rather than grow
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append(_observation(location, int(ts if ts is not None else time.time()), current))
+        self.recorded += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        return conn
+
+    def _write(self, rows: List[Observation], prune_before: Optional[Dict[str, int]]) -> int:
+        with self._write_lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            conn = self._conn
+            with conn:
+                # A location fetched twice within a second keeps one row and counts once in the rollups
+                inserted = [
+                    row for row in rows
+                    if conn.execute("INSERT OR IGNORE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row).rowcount
+                ]
+                for resolution, width in RESOLUTIONS.items():
+                    conn.executemany(_rollup_sql(resolution), [
+                        (location, ts - ts % width, temp, temp, temp, humidity, pressure, wind, wind)
+                        for location, ts, temp, _, humidity, pressure, wind, _ in inserted
+                    ])
+                if prune_before is not None:
+                    conn.execute("DELETE FROM observations WHERE ts < ?", (prune_before["raw"],))
+                    for resolution in RESOLUTIONS:
+                        conn.execute(f"DELETE FROM rollup_{resolution} WHERE bucket < ?", (prune_before[resolution],))
+            return len(inserted)
+
+    async def flush(self) -> int:
+        """Write buffered observations and return how many new rows were stored"""
+        rows = list(self._buffer)
+        self._buffer.clear()
+        now = time.time()
+        prune_before = None
+        if now - self._last_pruned >= 3600:
+            prune_before = {name: int(now - days * 86400) for name, days in self.retention_days.items()}
+        if not rows and prune_before is None:
+            return 0
+        try:
+            inserted = await asyncio.get_running_loop().run_in_executor(None, self._write, rows, prune_before)
+        except sqlite3.Error as e:
+            self.write_failures += 1
+            logger.warning("Writing %d observations to %s failed: %s", len(rows), self.path, e)
+            return 0
+        if prune_before is not None:
+            self._last_pruned = now
+        self.written += inserted
+        return inserted
+
+    async def query(
+        self,
+        location: str,
+        start: float,
+        end: float,
+        resolution: str = "hour"
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the points for location in [start, end) in chunks, oldest first
+
+        resolution is "raw" for individual observations or one of RESOLUTIONS.
+        Each chunk is a separate keyset query, so no read transaction stays
+        open while a slow client consumes the stream.
+        """
+        if resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown history resolution: {resolution}")
+        if resolution in RESOLUTIONS:
+            # Include the bucket that start falls into
+            start -= start % RESOLUTIONS[resolution]
+        if not os.path.exists(self.path):
+            return
+        loop = asyncio.get_running_loop()
+        conn = await loop.run_in_executor(None, self._reader)
+        try:
+            after = int(start) - 1
+            while True:
+                rows = await loop.run_in_executor(None, self._read_chunk, conn, location, after, int(end), resolution)
+                if not rows:
+                    return
+                after = rows[-1][0]
+                yield [_point(row, resolution) for row in rows]
+                if len(rows) < _READ_CHUNK:
+                    return
+        finally:
+            conn.close()
+
+    def _reader(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=5.0, check_same_thread=False)
+
+    @staticmethod
+    def _read_chunk(conn: sqlite3.Connection, location: str, after: int, end: int, resolution: str) -> List[tuple]:
+        if resolution == "raw":
+            sql = """SELECT ts, temperature, feels_like, humidity, pressure, wind_speed, condition FROM observations
+                WHERE location = ? AND ts > ? AND ts < ? ORDER BY ts LIMIT ?"""
+        else:
+            sql = f"""SELECT bucket, samples, temp_min, temp_max, temp_sum, humidity_sum, pressure_sum, wind_max, wind_sum
+                FROM rollup_{resolution} WHERE location = ? AND bucket > ? AND bucket < ? ORDER BY bucket LIMIT ?"""
+        try:
+            return conn.execute(sql, (location, after, end, _READ_CHUNK)).fetchall()
+        except sqlite3.OperationalError:
+            # Tables are created by the first write
+            return []
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush loop, write what is buffered and close the writer"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        with self._write_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "recorded": self.recorded,
+            "written": self.written,
+            "buffered": len(self._buffer),
+            "dropped": self.dropped,
+            "write_failures": self.write_failures,
+        }
+
+
+def _point(row: tuple, resolution: str) -> Dict[str, Any]:
+    if resolution == "raw":
+        ts, temperature, feels_like, humidity, pressure, wind_speed, condition = row
+        return {"time": ts, "temperature": temperature, "feelsLike": feels_like, "humidity": humidity,
+                "pressure": pressure, "windSpeed": wind_speed, "condition": condition}
+    bucket, samples, temp_min, temp_max, temp_sum, humidity_sum, pressure_sum, wind_max, wind_sum = row
+    return {
+        "time": bucket,
+        "samples": samples,
+        "temperature": _mean(temp_sum, samples),
+        "temperatureMin": temp_min,
+        "temperatureMax": temp_max,
+        "humidity": _mean(humidity_sum, samples),
+        "pressure": _mean(pressure_sum, samples),
+        "windSpeed": _mean(wind_sum, samples),
+        "windMax": wind_max,
+    }
+
+
+def _mean(total: Optional[float], samples: int) -> Optional[float]:
+    return round(total / samples, 1) if total is not None and samples else None
+
+
+def create_history_store() -> Optional[HistoryStore]:
+    """Build the store from HISTORY_PATH; an empty path disables history"""
+    path = os.getenv("HISTORY_PATH", DEFAULT_HISTORY_PATH)
+    if not path:
+        return None
+    return HistoryStore(
+        path,
+        flush_interval=float(os.getenv("HISTORY_FLUSH_INTERVAL", 5)),
+        retention_days={
+            "raw": float(os.getenv("HISTORY_RAW_DAYS", 7)),
+            "hour": float(os.getenv("HISTORY_HOURLY_DAYS", 30)),
+            "day": float(os.getenv("HISTORY_DAILY_DAYS", 365)),
+        },
+    )
@@ -0,0 +1,63 @@
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from services.cache import CacheEntry
+from services.serialization import entry_body, json_response, negotiate
+
+
+def validator_headers(entry: CacheEntry, now: Optional[float] = None, coding: Optional[str] = None) -> Dict[str, str]:
+    """ETag (of the representation in coding), Last-Modified and Cache-Control matching the entry's remaining TTL"""
+    now = now if now is not None else time.time()
+
+    max_age = max(0, int(entry.stale_at - now))
+    stale_window = max(0, int(entry.expires_at - max(now, entry.stale_at)))
+    cache_control = f"public, max-age={max_age}"
+    if stale_window:
+        cache_control += f", stale-while-revalidate={stale_window}"
+
+    return {
+        "ETag": entry_body(entry).etag_for(coding),
+        "Last-Modified": formatdate(int(entry.stored_at), usegmt=True),
+        "Cache-Control": cache_control,
+    }
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def _not_modified_since(if_modified_since: str, stored_at: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(stored_at) <= since
+
+
+def is_not_modified(request: Request, headers: Dict[str, str], entry: CacheEntry) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since when it is absent"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, headers["ETag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        return _not_modified_since(if_modified_since, entry.stored_at)
+    return False
+
+
+def cached_response(request: Request, entry: CacheEntry) -> Response:
+    """Serve a cache entry: 304 if the client's copy is current, else its pre-encoded bytes"""
+    body = entry_body(entry)
+    coding, vary = negotiate(request, body)
+    # The 304 varies on Accept-Encoding just like the 200 it stands for
+    headers = {**validator_headers(entry, coding=coding), **vary}
+    if is_not_modified(request, headers, entry):
+        return Response(status_code=304, headers=headers)
+    return json_response(request, body, headers=headers, negotiated=(coding, vary))
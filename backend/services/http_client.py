@@ -0,0 +1,66 @@
+import httpx
+import logging
+import os
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    if value.lower() == "none":
+        return None
+    return float(value)
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 is opt-in and needs the optional `h2` package"""
+    if os.getenv("HTTP_HTTP2", "false").lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP_HTTP2 is set but the 'h2' package is not installed; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the shared upstream client from environment configuration"""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", 30.0),
+    )
+    timeout = httpx.Timeout(
+        connect=_env_float("HTTP_CONNECT_TIMEOUT", 3.0),
+        read=_env_float("HTTP_READ_TIMEOUT", 5.0),
+        write=_env_float("HTTP_WRITE_TIMEOUT", 5.0),
+        pool=_env_float("HTTP_POOL_TIMEOUT", 2.0),
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=_http2_enabled())
+
+
+def pool_stats(client: Optional[httpx.AsyncClient]) -> Dict[str, int]:
+    """Report open, idle and waiting counts for the client's connection pool"""
+    stats = {"open": 0, "idle": 0, "active": 0, "waiting": 0}
+    if client is None or client.is_closed:
+        return stats
+
+    # httpx does not expose pool state publicly, so read it from the httpcore pool
+    pool = getattr(client._transport, "_pool", None)
+    if pool is None:
+        return stats
+
+    for connection in pool.connections:
+        if connection.is_closed():
+            continue
+        stats["open"] += 1
+        if connection.is_idle():
+            stats["idle"] += 1
+        else:
+            stats["active"] += 1
+    stats["waiting"] = sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+    return stats
@@ -0,0 +1,70 @@
+import unicodedata
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from services.errors import InvalidLocation
+
+# Longer than any city name people actually search for
+MAX_CITY_LENGTH = 100
+
+# Punctuation found in real place names ("St. John's", "Saint-Étienne", "Washington, D.C.")
+_NAME_PUNCTUATION = frozenset(" '’.,-()")
+
+
+def clean_city(city: str) -> str:
+    """Canonical form of a user-supplied city name; raises InvalidLocation
+
+    Folds compatibility characters (NFKC, so full-width letters become
+    ASCII) and collapses whitespace. Case is kept: upstream ignores it and
+    cache keys fold it.
+    """
+    city = unicodedata.normalize("NFKC", city)
+    if any(unicodedata.category(ch)[0] == "C" for ch in city):
+        raise InvalidLocation("City name contains control characters")
+    city = " ".join(city.split())
+    if not city:
+        raise InvalidLocation("City name must not be empty")
+    if len(city) > MAX_CITY_LENGTH:
+        raise InvalidLocation(f"City name is longer than {MAX_CITY_LENGTH} characters")
+    has_letter = False
+    for ch in city:
+        category = unicodedata.category(ch)[0]
+        if category == "L":
+            has_letter = True
+        elif category not in ("M", "N") and ch not in _NAME_PUNCTUATION:
+            raise InvalidLocation(f"City name contains an invalid character: {ch!r}")
+    if not has_letter:
+        raise InvalidLocation("City name must contain letters")
+    return city
+
+
+def clean_country_code(country_code: Optional[str]) -> Optional[str]:
+    """Upper-case ISO 3166 alpha-2 code, or None when not given; raises InvalidLocation"""
+    if country_code is None:
+        return None
+    code = unicodedata.normalize("NFKC", country_code).strip().upper()
+    if not code:
+        return None
+    if len(code) != 2 or not code.isascii() or not code.isalpha():
+        raise InvalidLocation("Country code must be two letters (ISO 3166, e.g. US, GB)")
+    return code
+
+
+@lru_cache(maxsize=4096)
+def clean_location(city: Optional[str], country_code: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """clean_city and clean_country_code together, memoized for repeat lookups
+
+    A country code typed into the name, as in OpenWeather's own "London,GB"
+    syntax, is split off so it shares a cache entry with city=London&country_code=GB.
+    """
+    if city is None:
+        return None, clean_country_code(country_code)
+    city = unicodedata.normalize("NFKC", city)
+    name, comma, suffix = city.rpartition(",")
+    suffix = suffix.strip()
+    if comma and len(suffix) == 2 and suffix.isascii() and suffix.isalpha():
+        embedded, given = clean_country_code(suffix), clean_country_code(country_code)
+        if given is not None and given != embedded:
+            raise InvalidLocation(f"City names country {embedded} but country_code is {given}")
+        return clean_city(name), embedded
+    return clean_city(city), clean_country_code(country_code)
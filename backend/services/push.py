@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from services.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Returns (version, payload); a new version is pushed to every subscriber of the topic.
+# The payload is shared by all of them, so it must not carry any one subscriber's labels.
+TopicLoader = Callable[[], Awaitable[Tuple[Hashable, Dict[str, Any]]]]
+
+
+class TooManySubscribers(Exception):
+    """The per-worker push connection cap is reached"""
+
+
+class Subscription:
+    """One client connection: the latest undelivered update per topic
+
+    A slow client never builds a backlog. A newer update for a topic replaces
+    an undelivered older one, so memory per connection is bounded by the
+    number of topics it follows. Several spellings can share one topic, so
+    a topic may carry several label sets (e.g. each city as the connection
+    asked for it); every update is sent once per label set, prefixed with it.
+    """
+
+    def __init__(self, topics: Dict[str, TopicLoader], labels: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.topics = topics
+        self.closed = False
+        self._prefixes = {topic: [_label_prefix(each) for each in (labels or {}).get(topic) or [None]] for topic in topics}
+        self._pending: "OrderedDict[str, List[bytes]]" = OrderedDict()
+        self._wake = asyncio.Event()
+
+    def offer(self, topic: str, payload: bytes) -> bool:
+        """Queue an encoded topic payload; True if it replaced an update the client had not received yet"""
+        replaced = self._pending.pop(topic, None) is not None
+        # payload is an encoded JSON object; splice the labels in as its first members
+        self._pending[topic] = [prefix + payload[1:] for prefix in self._prefixes[topic]]
+        self._wake.set()
+        return replaced
+
+    def close(self) -> None:
+        self.closed = True
+        self._wake.set()
+
+    async def next_batch(self, timeout: float) -> Optional[list]:
+        """Wait up to timeout for updates; [] on timeout, None once closed"""
+        if not self._pending and not self.closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._wake.clear()
+        if self.closed:
+            return None
+        batch = [message for messages in self._pending.values() for message in messages]
+        self._pending.clear()
+        return batch
+
+
+class WeatherBroadcaster:
+    """Fan weather updates for subscribed cities out to push connections
+
+    Each city (topic) is loaded once per interval no matter how many
+    connections follow it, through the same cache and single-flight path as
+    the polling endpoints, and only changed versions are sent.
+    """
+
+    def __init__(self, interval: float = 60.0, max_connections: int = 1000, heartbeat: float = 15.0):
+        self.interval = interval
+        self.max_connections = max_connections
+        self.heartbeat = heartbeat
+        self._subscriptions: Set[Subscription] = set()
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._loaders: Dict[str, TopicLoader] = {}
+        self._latest: Dict[str, Tuple[Hashable, bytes]] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+        self.published = 0
+        self.conflated = 0
+        self.rejected = 0
+        self.load_failures = 0
+
+    def subscribe(
+        self,
+        topics: Dict[str, TopicLoader],
+        labels: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    ) -> Subscription:
+        """Follow topics; each label set for a topic gets its own copy of that topic's events"""
+        if len(self._subscriptions) >= self.max_connections:
+            self.rejected += 1
+            raise TooManySubscribers(f"Push connection limit of {self.max_connections} reached")
+        subscription = Subscription(topics, labels)
+        self._subscriptions.add(subscription)
+        for topic, loader in topics.items():
+            self._topics.setdefault(topic, set()).add(subscription)
+            # Every loader for a topic loads the same place; keep the first
+            self._loaders.setdefault(topic, loader)
+            latest = self._latest.get(topic)
+            if latest is not None:
+                subscription.offer(topic, latest[1])
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        self._subscriptions.discard(subscription)
+        for topic in subscription.topics:
+            followers = self._topics.get(topic)
+            if followers is None:
+                continue
+            followers.discard(subscription)
+            if not followers:
+                del self._topics[topic]
+                self._loaders.pop(topic, None)
+                self._latest.pop(topic, None)
+
+    async def refresh(self, topics: Optional[list] = None) -> int:
+        """Load each topic once and publish those whose version changed; return how many were published"""
+        topics = [topic for topic in (topics if topics is not None else list(self._topics)) if topic in self._loaders]
+        results = await asyncio.gather(*(self._loaders[topic]() for topic in topics), return_exceptions=True)
+        published = 0
+        for topic, result in zip(topics, results):
+            if isinstance(result, Exception):
+                self.load_failures += 1
+                logger.warning("Push refresh of %s failed: %s", topic, result)
+                continue
+            version, payload = result
+            latest = self._latest.get(topic)
+            if latest is not None and latest[0] == version:
+                continue
+            message = dumps(payload)
+            self._latest[topic] = (version, message)
+            for subscription in self._topics.get(topic, ()):
+                if subscription.offer(topic, message):
+                    self.conflated += 1
+            published += 1
+        self.published += published
+        return published
+
+    async def stream(self, subscription: Subscription) -> AsyncIterator[bytes]:
+        """Server-Sent Events for a subscription, with heartbeats so dead connections are noticed"""
+        try:
+            # New topics get their first update right away instead of at the next tick
+            await self.refresh([topic for topic in subscription.topics if topic not in self._latest])
+            event_id = 0
+            while True:
+                batch = await subscription.next_batch(self.heartbeat)
+                if batch is None:
+                    return
+                if not batch:
+                    yield b": ping\n\n"
+                    continue
+                for message in batch:
+                    event_id += 1
+                    yield b"event: weather\nid: %d\ndata: %s\n\n" % (event_id, message)
+        finally:
+            self.unsubscribe(subscription)
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Push refresh failed: %s", e)
+
+    async def start(self) -> None:
+        if self._poller is None and self.interval > 0:
+            self._poller = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        """Stop polling and end every open stream"""
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+        for subscription in list(self._subscriptions):
+            subscription.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self._subscriptions),
+            "max_connections": self.max_connections,
+            "topics": len(self._topics),
+            "published": self.published,
+            "conflated": self.conflated,
+            "rejected": self.rejected,
+            "load_failures": self.load_failures,
+        }
+
+
+def _label_prefix(labels: Optional[Dict[str, Any]]) -> bytes:
+    """Opening of a JSON object holding labels, ready for another object's members"""
+    return dumps(labels)[:-1] + b"," if labels else b"{"
+
+
+def create_broadcaster() -> WeatherBroadcaster:
+    """Build the broadcaster from environment configuration"""
+    return WeatherBroadcaster(
+        interval=float(os.getenv("PUSH_INTERVAL", 60)),
+        max_connections=int(os.getenv("PUSH_MAX_CONNECTIONS", 1000)),
+        heartbeat=float(os.getenv("PUSH_HEARTBEAT", 15)),
+    )
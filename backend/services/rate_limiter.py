@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from services.errors import QuotaExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaGovernor:
+    """Token-bucket budget for outbound OpenWeather calls
+
+    A per-minute token bucket smooths bursts while a per-day counter (reset at
+    UTC midnight, like OpenWeather's own accounting) caps total usage. Callers
+    that find the bucket empty wait in a bounded FIFO queue until a token frees
+    up or their deadline passes, at which point QuotaExceeded is raised.
+    """
+
+    def __init__(
+        self,
+        per_minute: Optional[int] = 60,
+        per_day: Optional[int] = None,
+        max_waiters: int = 100,
+        max_wait: float = 2.0,
+    ):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+
+        self._tokens = float(per_minute) if per_minute else 0.0
+        self._refilled_at = time.monotonic()
+        self._day = self._today()
+        self._day_used = 0
+        self._blocked_until = 0.0
+        self._waiting = 0
+        self._lock = asyncio.Lock()
+
+        self.granted = 0
+        self.rejected = 0
+        self.throttled = 0
+
+    @staticmethod
+    def _today():
+        return datetime.now(timezone.utc).date()
+
+    @staticmethod
+    def _seconds_until_midnight() -> float:
+        now = datetime.now(timezone.utc)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        return (midnight - now).total_seconds()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.per_minute:
+            elapsed = now - self._refilled_at
+            self._tokens = min(float(self.per_minute), self._tokens + elapsed * self.per_minute / 60.0)
+        self._refilled_at = now
+
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._day_used = 0
+
+    def _day_exhausted(self) -> bool:
+        return self.per_day is not None and self._day_used >= self.per_day
+
+    def _time_until_token(self) -> float:
+        """Seconds until a token is available, ignoring the daily budget"""
+        wait = max(0.0, self._blocked_until - time.monotonic())
+        if self.per_minute and self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) * 60.0 / self.per_minute)
+        return wait
+
+    def _try_take(self) -> bool:
+        self._refill()
+        if self._day_exhausted() or self._time_until_token() > 0:
+            return False
+        if self.per_minute:
+            self._tokens -= 1
+        self._day_used += 1
+        self.granted += 1
+        return True
+
+    async def acquire(self) -> None:
+        """Take one call from the budget, waiting up to max_wait for a token"""
+        if self._waiting == 0 and self._try_take():
+            return
+
+        if self._day_exhausted():
+            self.rejected += 1
+            raise QuotaExceeded("Daily OpenWeather call budget exhausted", retry_after=self._seconds_until_midnight())
+        if self._waiting >= self.max_waiters:
+            self.rejected += 1
+            raise QuotaExceeded("Too many requests waiting for OpenWeather budget", retry_after=self._time_until_token())
+
+        self.throttled += 1
+        deadline = time.monotonic() + self.max_wait
+        self._waiting += 1
+        try:
+            # The lock keeps waiters in FIFO order; it is bounded by the same deadline
+            await asyncio.wait_for(self._lock.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+            try:
+                while not self._try_take():
+                    if self._day_exhausted():
+                        raise QuotaExceeded("Daily OpenWeather call budget exhausted", retry_after=self._seconds_until_midnight())
+                    wait = self._time_until_token()
+                    if time.monotonic() + wait > deadline:
+                        raise QuotaExceeded("OpenWeather call budget exhausted", retry_after=wait)
+                    await asyncio.sleep(wait)
+            finally:
+                self._lock.release()
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise QuotaExceeded("Timed out waiting for OpenWeather budget", retry_after=self._time_until_token())
+        except QuotaExceeded:
+            self.rejected += 1
+            raise
+        finally:
+            self._waiting -= 1
+
+    def penalize(self, retry_after: float) -> None:
+        """Stop granting tokens for retry_after seconds (upstream answered 429)"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        logger.warning("OpenWeather rate limited us; pausing upstream calls for %.0fs", retry_after)
+
+    def remaining(self) -> Dict[str, Optional[int]]:
+        """Calls left in the minute bucket and the day's budget; None where there is no limit"""
+        self._refill()
+        return {
+            "minute": int(self._tokens) if self.per_minute else None,
+            "day": max(0, self.per_day - self._day_used) if self.per_day is not None else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        remaining = self.remaining()
+        return {
+            "minute_remaining": remaining["minute"],
+            "day_remaining": remaining["day"],
+            "day_used": self._day_used,
+            "waiting": self._waiting,
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+        }
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    value = int(value)
+    return value if value > 0 else None
+
+
+def _share(budget: Optional[int], workers: int) -> Optional[int]:
+    return max(1, budget // workers) if budget is not None else None
+
+
+def create_governor() -> QuotaGovernor:
+    """Build the upstream call governor from environment configuration
+
+    OpenWeather counts calls per API key, so the configured budgets are
+    split evenly across the WEB_CONCURRENCY worker processes.
+    """
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY") or 1))
+    return QuotaGovernor(
+        per_minute=_share(_env_int("UPSTREAM_CALLS_PER_MINUTE", 60), workers),
+        per_day=_share(_env_int("UPSTREAM_CALLS_PER_DAY", None), workers),
+        max_waiters=int(os.getenv("UPSTREAM_MAX_WAITERS", 100)),
+        max_wait=float(os.getenv("UPSTREAM_MAX_WAIT", 2.0)),
+    )
@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from services.cache import CacheBackend, CacheEntry, MemoryCache
+from services.serialization import dumps, loads
+
+try:
+    from redis import asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:  # The memory backend works without the redis package
+    aioredis = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+# stored_at, stale_at, expires_at as big-endian doubles, followed by the JSON value
+_HEADER = struct.Struct("!ddd")
+
+# Delete the lock only if it still holds our token
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def pack_entry(entry: CacheEntry) -> bytes:
+    return _HEADER.pack(entry.stored_at, entry.stale_at, entry.expires_at) + dumps(entry.value)
+
+
+def unpack_entry(data: bytes) -> CacheEntry:
+    stored_at, stale_at, expires_at = _HEADER.unpack_from(data)
+    return CacheEntry(value=loads(data[_HEADER.size:]), stored_at=stored_at, stale_at=stale_at, expires_at=expires_at)
+
+
+class TieredCache(CacheBackend):
+    """In-process L1 in front of a Redis L2 shared by every worker and node
+
+    Reads are served from L1 while fresh; stale or missing L1 entries are
+    looked up in Redis, whose keys expire at the entry's hard TTL. Writes go
+    to both tiers and are announced on a pub/sub channel so other workers
+    drop their L1 copy. Loads of the same key are coordinated across workers
+    with a short-lived Redis lock. Redis errors degrade to L1-only caching.
+    """
+
+    def __init__(
+        self,
+        redis: Any,
+        l1: Optional[MemoryCache] = None,
+        prefix: str = "weather:",
+        lock_ttl: float = 10.0,
+        lock_wait: float = 5.0,
+        lock_poll_interval: float = 0.05,
+    ):
+        l1 = l1 if l1 is not None else MemoryCache()
+        super().__init__(l1.ttls, l1.stale_ttls)
+        self.redis = redis
+        self.l1 = l1
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.lock_poll_interval = lock_poll_interval
+        self.channel = f"{prefix}invalidate"
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+        self.invalidations = 0
+        self.locks_acquired = 0
+        self.lock_waits = 0
+        self.remote_fills = 0
+
+    def _redis_key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    async def get_entry(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        local = await self.l1.get_entry(namespace, key)
+        if local is not None and not local.is_stale():
+            self.hits += 1
+            return local
+
+        entry = local
+        shared = await self._l2_get(namespace, key)
+        if shared is not None and (local is None or shared.stored_at > local.stored_at):
+            entry = self.l1.set_entry(namespace, key, shared)
+
+        if entry is None:
+            self.misses += 1
+        elif entry.is_stale():
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def contains(self, namespace: str, key: str) -> bool:
+        if await self.l1.contains(namespace, key):
+            return True
+        shared = await self._l2_get(namespace, key)
+        if shared is None or shared.is_stale():
+            return False
+        self.l1.set_entry(namespace, key, shared)
+        return True
+
+    async def last_resort(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        # Redis drops keys at their hard TTL; only the L1 copy outlives it
+        return await self.l1.last_resort(namespace, key)
+
+    async def _l2_get(self, namespace: str, key: str) -> Optional[CacheEntry]:
+        try:
+            data = await self.redis.get(self._redis_key(namespace, key))
+        except RedisError as e:
+            self.l2_errors += 1
+            logger.warning("Redis read of %s:%s failed: %s", namespace, key, e)
+            return None
+        if data is None:
+            self.l2_misses += 1
+            return None
+        entry = unpack_entry(data)
+        if entry.is_expired():
+            self.l2_misses += 1
+            return None
+        self.l2_hits += 1
+        return entry
+
+    async def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ) -> CacheEntry:
+        entry = await self.l1.set(namespace, key, value, ttl, stale_ttl)
+        redis_key = self._redis_key(namespace, key)
+        try:
+            await self.redis.set(redis_key, pack_entry(entry), px=max(1, int((entry.expires_at - time.time()) * 1000)))
+            await self._publish(namespace, key)
+        except RedisError as e:
+            self.l2_errors += 1
+            logger.warning("Redis write of %s:%s failed: %s", namespace, key, e)
+        return entry
+
+    def resize(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        # Encoded bodies live only in the L1 copy
+        self.l1.resize(namespace, key, entry)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        await self.l1.delete(namespace, key)
+        redis_key = self._redis_key(namespace, key)
+        try:
+            await self.redis.delete(redis_key)
+            await self._publish(namespace, key)
+        except RedisError as e:
+            self.l2_errors += 1
+            logger.warning("Redis delete of %s:%s failed: %s", namespace, key, e)
+
+    async def clear(self) -> None:
+        await self.l1.clear()
+        try:
+            batch = []
+            async for redis_key in self.redis.scan_iter(match=f"{self.prefix}*", count=500):
+                batch.append(redis_key)
+                if len(batch) >= 500:
+                    await self.redis.delete(*batch)
+                    batch = []
+            if batch:
+                await self.redis.delete(*batch)
+            await self._publish(None, None)
+        except RedisError as e:
+            self.l2_errors += 1
+            logger.warning("Redis clear failed: %s", e)
+
+    async def _publish(self, namespace: Optional[str], key: Optional[str]) -> None:
+        """Announce a changed key; a null namespace means the whole cache was cleared"""
+        await self.redis.publish(self.channel, dumps([self._origin, namespace, key]))
+
+    async def _invalidate_local(self, namespace: Optional[str], key: Optional[str]) -> None:
+        self.invalidations += 1
+        if namespace is None:
+            await self.l1.clear()
+        else:
+            await self.l1.delete(namespace, key)
+
+    async def _listen(self) -> None:
+        """Drop L1 entries that other workers have replaced or deleted"""
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    origin, namespace, key = loads(message["data"])
+                    if origin != self._origin:
+                        await self._invalidate_local(namespace, key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.l2_errors += 1
+                logger.warning("Redis invalidation listener failed, resubscribing: %s", e)
+                await asyncio.sleep(5.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    @asynccontextmanager
+    async def fill_lock(self, namespace: str, key: str) -> AsyncIterator[bool]:
+        """Let one worker load a key while the others wait for its result in Redis"""
+        lock_key = f"{self.prefix}lock:{namespace}:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except RedisError as e:
+            self.l2_errors += 1
+            logger.warning("Redis lock for %s:%s failed: %s", namespace, key, e)
+            yield True
+            return
+
+        if not acquired:
+            self.lock_waits += 1
+            if await self._wait_for_fill(lock_key):
+                self.remote_fills += 1
+                yield False
+                return
+            # The holder is slow or gone; load it ourselves
+            yield True
+            return
+
+        self.locks_acquired += 1
+        try:
+            yield True
+        finally:
+            try:
+                await self.redis.eval(_RELEASE_LOCK, 1, lock_key, token)
+            except RedisError as e:
+                self.l2_errors += 1
+                logger.warning("Redis unlock for %s:%s failed: %s", namespace, key, e)
+
+    async def _wait_for_fill(self, lock_key: str) -> bool:
+        """Poll until the lock is released; True if that happened within lock_wait"""
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.lock_poll_interval)
+            try:
+                if not await self.redis.exists(lock_key):
+                    return True
+            except RedisError:
+                return False
+        return False
+
+    async def start(self) -> None:
+        await self.l1.start()
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.l1.stop()
+        await self.redis.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "l1": self.l1.stats(),
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            "l2_errors": self.l2_errors,
+            "invalidations": self.invalidations,
+            "locks_acquired": self.locks_acquired,
+            "lock_waits": self.lock_waits,
+            "remote_fills": self.remote_fills,
+        })
+        return stats
+
+
+def create_tiered_cache(l1: MemoryCache) -> TieredCache:
+    """Build a Redis-backed cache from environment configuration"""
+    if aioredis is None:
+        raise ValueError("CACHE_BACKEND=redis requires the redis package")
+    client = aioredis.from_url(
+        os.getenv("REDIS_URL", "redis://localhost:6379"),
+        max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 50)),
+        socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", 1.0)),
+        socket_connect_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", 1.0)),
+        health_check_interval=30,
+    )
+    return TieredCache(
+        client,
+        l1=l1,
+        prefix=os.getenv("REDIS_KEY_PREFIX", "weather:"),
+        lock_ttl=float(os.getenv("CACHE_LOCK_TTL", 10)),
+        lock_wait=float(os.getenv("CACHE_LOCK_WAIT", 5)),
+    )
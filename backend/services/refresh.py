@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from services.cache import CacheBackend, CacheEntry
+from services.errors import UpstreamUnavailable
+from services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+CacheKey = Tuple[str, str]
+
+
+class CacheRefresher:
+    """Read-through cache access with stale-while-revalidate and hot-key refresh
+
+    Fresh entries are served directly. Entries past their soft TTL but within
+    their hard TTL are served immediately while a background task refreshes
+    them. A scheduler also refreshes the most requested keys shortly before
+    they go stale, so hot cities never take a blocking miss.
+    """
+
+    def __init__(
+        self,
+        cache: CacheBackend,
+        flights: Optional[SingleFlight] = None,
+        top_n: int = 20,
+        refresh_interval: float = 30.0,
+        refresh_ahead: float = 60.0,
+        max_tracked: int = 1000,
+    ):
+        self.cache = cache
+        self.flights = flights if flights is not None else SingleFlight()
+        self.top_n = top_n
+        self.refresh_interval = refresh_interval
+        self.refresh_ahead = refresh_ahead
+        self.max_tracked = max_tracked
+
+        self._popularity: Counter = Counter()
+        self._loaders: Dict[CacheKey, Loader] = {}
+        self._stale_at: Dict[CacheKey, float] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._scheduler: Optional[asyncio.Task] = None
+
+        self.served_stale = 0
+        self.served_expired = 0
+        self.background_refreshes = 0
+        self.proactive_refreshes = 0
+        self.refresh_failures = 0
+        self.refresh_lag_last = 0.0
+        self.refresh_lag_max = 0.0
+        self._refresh_lag_total = 0.0
+        self._refresh_lag_count = 0
+
+    async def get_or_load(self, namespace: str, key: str, loader: Loader) -> Any:
+        """Return the cached value for key, loading it through loader on a miss"""
+        entry = await self.get_or_load_entry(namespace, key, loader)
+        return entry.value
+
+    async def get_or_load_entry(self, namespace: str, key: str, loader: Loader) -> CacheEntry:
+        """Like get_or_load, but return the cache entry with its timestamps"""
+        self._track(namespace, key, loader)
+
+        entry = await self.cache.get_entry(namespace, key)
+        if entry is not None:
+            # Entries filled elsewhere (the other kind of a combined fetch, a snapshot,
+            # another worker through Redis) are refreshed ahead of time once they are hot
+            self._stale_at[(namespace, key)] = entry.stale_at
+            if entry.is_stale():
+                self.served_stale += 1
+                self._refresh_in_background(namespace, key, loader, entry.stale_at)
+            return entry
+
+        try:
+            return await self._load(namespace, key, loader)
+        except UpstreamUnavailable:
+            # Out of upstream budget or circuit open: an expired copy beats a 503
+            entry = await self.cache.last_resort(namespace, key)
+            if entry is None:
+                raise
+            self.served_expired += 1
+            return entry
+
+    async def _load(self, namespace: str, key: str, loader: Loader) -> CacheEntry:
+        """Fetch through the single-flight layer and store the result"""
+        async def load_and_store() -> CacheEntry:
+            async with self.cache.fill_lock(namespace, key) as owner:
+                if not owner:
+                    # Another worker held the lock; use its result if it landed
+                    entry = await self.cache.get_entry(namespace, key)
+                    if entry is not None and not entry.is_stale():
+                        self._stale_at[(namespace, key)] = entry.stale_at
+                        return entry
+                value = await loader()
+                entry = await self.cache.set(namespace, key, value)
+            self._stale_at[(namespace, key)] = entry.stale_at
+            return entry
+
+        return await self.flights.do(f"{namespace}:{key}", load_and_store)
+
+    def _track(self, namespace: str, key: str, loader: Loader) -> None:
+        cache_key = (namespace, key)
+        self._popularity[cache_key] += 1
+        self._loaders[cache_key] = loader
+        if len(self._popularity) > self.max_tracked:
+            self._prune(self.max_tracked // 2)
+
+    def _prune(self, keep: int) -> None:
+        """Forget all but the `keep` most requested keys"""
+        hottest = dict(self._popularity.most_common(keep))
+        for cache_key in list(self._popularity):
+            if cache_key not in hottest:
+                del self._popularity[cache_key]
+                self._loaders.pop(cache_key, None)
+                self._stale_at.pop(cache_key, None)
+
+    def _refresh_in_background(self, namespace: str, key: str, loader: Loader, stale_at: float) -> None:
+        if self.flights.in_flight(f"{namespace}:{key}"):
+            return
+        self.background_refreshes += 1
+        task = asyncio.create_task(self._refresh(namespace, key, loader, stale_at))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _refresh(self, namespace: str, key: str, loader: Loader, stale_at: float) -> None:
+        try:
+            await self._load(namespace, key, loader)
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning("Background refresh of %s:%s failed: %s", namespace, key, e)
+            return
+        self._record_lag(max(0.0, time.time() - stale_at))
+
+    def _record_lag(self, lag: float) -> None:
+        self.refresh_lag_last = lag
+        self.refresh_lag_max = max(self.refresh_lag_max, lag)
+        self._refresh_lag_total += lag
+        self._refresh_lag_count += 1
+
+    async def refresh_hot(self) -> int:
+        """Refresh the top-N most requested keys that are about to go stale"""
+        deadline = time.time() + self.refresh_ahead
+        due = []
+        for cache_key, _ in self._popularity.most_common(self.top_n):
+            stale_at = self._stale_at.get(cache_key)
+            if stale_at is not None and stale_at <= deadline:
+                due.append((cache_key, stale_at))
+
+        for (namespace, key), stale_at in due:
+            loader = self._loaders.get((namespace, key))
+            if loader is None:
+                continue
+            self.proactive_refreshes += 1
+            await self._refresh(namespace, key, loader, stale_at)
+
+        # Decay popularity so keys that stop being requested fall out of the top-N
+        for cache_key in list(self._popularity):
+            self._popularity[cache_key] //= 2
+            if self._popularity[cache_key] == 0:
+                del self._popularity[cache_key]
+                self._loaders.pop(cache_key, None)
+                self._stale_at.pop(cache_key, None)
+
+        return len(due)
+
+    async def _schedule_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                refreshed = await self.refresh_hot()
+                if refreshed:
+                    logger.debug("Proactively refreshed %d hot cache entries", refreshed)
+            except Exception as e:
+                logger.error("Hot key refresh failed: %s", e)
+
+    async def start(self) -> None:
+        if self._scheduler is None and self.top_n > 0 and self.refresh_interval > 0:
+            self._scheduler = asyncio.create_task(self._schedule_loop())
+
+    async def stop(self) -> None:
+        tasks = list(self._background)
+        if self._scheduler is not None:
+            tasks.append(self._scheduler)
+            self._scheduler = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "served_stale": self.served_stale,
+            "served_expired": self.served_expired,
+            "background_refreshes": self.background_refreshes,
+            "proactive_refreshes": self.proactive_refreshes,
+            "refresh_failures": self.refresh_failures,
+            "refresh_lag_last": round(self.refresh_lag_last, 3),
+            "refresh_lag_max": round(self.refresh_lag_max, 3),
+            "refresh_lag_avg": round(self._refresh_lag_total / self._refresh_lag_count, 3) if self._refresh_lag_count else 0.0,
+            "tracked_keys": len(self._popularity),
+        }
+
+
+def create_refresher(cache: CacheBackend, flights: Optional[SingleFlight] = None) -> CacheRefresher:
+    """Build the refresher from environment configuration"""
+    return CacheRefresher(
+        cache,
+        flights=flights,
+        top_n=int(os.getenv("REFRESH_TOP_N", 20)),
+        refresh_interval=float(os.getenv("REFRESH_INTERVAL", 30)),
+        refresh_ahead=float(os.getenv("REFRESH_AHEAD", 60)),
+    )
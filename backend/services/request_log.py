@@ -0,0 +1,35 @@
+import logging
+import os
+import random
+from typing import Any, Dict
+
+from services.serialization import dumps
+
+# Fraction of successful requests that get a log record; failures are always logged
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.01))
+
+
+class StructuredMessage:
+    """Log message that is only rendered to JSON if a handler actually emits it"""
+    __slots__ = ("event", "fields")
+
+    def __init__(self, event: str, fields: Dict[str, Any]):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return dumps({"event": self.event, **self.fields}).decode()
+
+
+def log_sampled(logger: logging.Logger, event: str, level: int = logging.INFO, **fields: Any) -> None:
+    """Log a structured per-request event for a LOG_SAMPLE_RATE fraction of calls
+
+    The level and sampling checks run before anything is formatted, so a
+    skipped record costs one comparison and one random draw. Handlers that
+    understand structure can read `event` and `fields` from the record.
+    """
+    if LOG_SAMPLE_RATE <= 0 or not logger.isEnabledFor(level):
+        return
+    if LOG_SAMPLE_RATE < 1 and random.random() >= LOG_SAMPLE_RATE:
+        return
+    logger.log(level, StructuredMessage(event, fields), extra={"event": event, "fields": fields})
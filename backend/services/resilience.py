@@ -0,0 +1,177 @@
+import logging
+import os
+import random
+import time
+from typing import Any, Dict
+
+from services.errors import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Upstream statuses worth retrying; 429 is left to the quota governor
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """The circuit breaker for an upstream endpoint is open"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by a shared retry budget
+
+    Every first attempt deposits `budget_ratio` tokens and every retry spends
+    one, so retries can never add more than that fraction of extra load on
+    top of normal traffic during an outage.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 2.0,
+        deadline: float = 10.0,
+        budget_ratio: float = 0.2,
+        min_budget: float = 10.0,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.budget_ratio = budget_ratio
+        self.min_budget = min_budget
+        self._budget = min_budget
+
+        self.retries = 0
+        self.budget_exhausted = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def record_request(self) -> None:
+        cap = max(self.min_budget, 10 * self.min_budget * self.budget_ratio)
+        self._budget = min(cap, self._budget + self.budget_ratio)
+
+    def allow_retry(self, attempt: int, started_at: float, delay: float) -> bool:
+        """Whether retry number `attempt` may run after sleeping `delay` seconds"""
+        if attempt >= self.max_attempts:
+            return False
+        if time.monotonic() + delay - started_at > self.deadline:
+            return False
+        if self._budget < 1:
+            self.budget_exhausted += 1
+            return False
+        self._budget -= 1
+        self.retries += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_attempts": self.max_attempts,
+            "retries": self.retries,
+            "budget_remaining": round(self._budget, 2),
+            "budget_exhausted": self.budget_exhausted,
+        }
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one upstream endpoint"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpen unless a call may go through now; True if the call is the half-open probe"""
+        if self.state == self.CLOSED:
+            return False
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            # Let exactly one probe through to test whether upstream recovered
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        raise CircuitOpen(f"Circuit for OpenWeather {self.name} is open", retry_after=max(remaining, 1.0))
+
+    def release_probe(self) -> None:
+        """Let another probe through after one ended without an upstream answer (quota, cancellation)"""
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("Circuit for OpenWeather %s closed", self.name)
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning("Circuit for OpenWeather %s opened after %d failures", self.name, self.consecutive_failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakers:
+    """Per-endpoint circuit breakers sharing one configuration"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+            self._breakers[name] = breaker
+        return breaker
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
+
+
+def create_retry_policy() -> RetryPolicy:
+    """Build the upstream retry policy from environment configuration"""
+    return RetryPolicy(
+        max_attempts=int(os.getenv("UPSTREAM_MAX_ATTEMPTS", 3)),
+        base_delay=float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", 0.1)),
+        max_delay=float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", 2.0)),
+        deadline=float(os.getenv("UPSTREAM_RETRY_DEADLINE", 10.0)),
+        budget_ratio=float(os.getenv("UPSTREAM_RETRY_BUDGET", 0.2)),
+    )
+
+
+def create_breakers() -> CircuitBreakers:
+    """Build the per-endpoint circuit breakers from environment configuration"""
+    return CircuitBreakers(
+        failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5)),
+        reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30)),
+    )
@@ -0,0 +1,114 @@
+import gzip
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from services.metrics import SERIALIZATION_LATENCY
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are skipped without the optional package
+    brotli = None
+
+# Payloads smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 512))
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON bytes produced by dumps"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass(slots=True)
+class EncodedBody:
+    """A JSON payload encoded once, with precomputed compressed variants and ETag"""
+    raw: bytes
+    etag: str
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.raw) + len(self.gzip or b"") + len(self.br or b"")
+
+    def etag_for(self, coding: Optional[str]) -> str:
+        """Strong ETag of the representation sent with coding; each content coding gets its own"""
+        return self.etag if coding is None else f'{self.etag[:-1]}-{coding}"'
+
+
+def encode_body(value: Any, compress_min_bytes: Optional[int] = None) -> EncodedBody:
+    with SERIALIZATION_LATENCY.time():
+        raw = dumps(value)
+        body = EncodedBody(raw=raw, etag='"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"')
+        if len(raw) >= (compress_min_bytes if compress_min_bytes is not None else COMPRESS_MIN_BYTES):
+            body.gzip = gzip.compress(raw, compresslevel=6, mtime=0)
+            if brotli is not None:
+                body.br = brotli.compress(raw, quality=5)
+    return body
+
+
+def entry_body(entry) -> EncodedBody:
+    """Encoded body of a cache entry, produced on first use and kept on the entry"""
+    if entry.body is None:
+        entry.body = encode_body(entry.value)
+    return entry.body
+
+
+def _accepted(request: Request) -> set:
+    header = request.headers.get("accept-encoding", "")
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def negotiate(request: Request, body: EncodedBody) -> Tuple[Optional[str], Dict[str, str]]:
+    """Best precomputed content coding the client accepts (None for identity) and the Vary header it implies"""
+    if body.gzip is None and body.br is None:
+        return None, {}
+    vary = {"Vary": "Accept-Encoding"}
+    accepted = _accepted(request)
+    if body.br is not None and "br" in accepted:
+        return "br", vary
+    if body.gzip is not None and "gzip" in accepted:
+        return "gzip", vary
+    return None, vary
+
+
+def json_response(
+    request: Request,
+    body: EncodedBody,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+    media_type: str = "application/json",
+    negotiated: Optional[Tuple[Optional[str], Dict[str, str]]] = None
+) -> Response:
+    """Raw response for pre-encoded JSON in the best precomputed encoding (negotiated unless given)"""
+    coding, vary = negotiated if negotiated is not None else negotiate(request, body)
+    headers = {**(headers or {}), **vary}
+    content = body.raw
+    if coding is not None:
+        content = getattr(body, coding)
+        headers["Content-Encoding"] = coding
+    return Response(content=content, status_code=status_code, headers=headers, media_type=media_type)
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight upstream call
+
+    The first caller for a key starts the work as a task; callers that arrive
+    while it is running await the same task. Results and errors are shared by
+    every waiter but nothing is remembered once the task finishes, so errors
+    are never cached.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once for all concurrent callers using the same key"""
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+        else:
+            self.coalesced += 1
+
+        # Shield so one waiter disconnecting does not cancel the shared call
+        return await asyncio.shield(task)
+
+    async def drain(self, timeout: float) -> int:
+        """Wait up to timeout for the calls in flight now; return how many are still running"""
+        tasks = list(self._calls.values())
+        if not tasks or timeout <= 0:
+            return len(tasks)
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        return len(pending)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Single-flight call for %s failed: %s", key, task.exception())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
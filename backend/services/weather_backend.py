@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import ForecastDay, WeatherData
+from services.cache import CacheEntry, create_cache
+from services.cache_snapshot import create_snapshotter
+from services.errors import LocationNotFound
+from services.geo_index import load_city_index, normalize_name
+from services.geohash import encode as geohash_encode
+from services.history import create_history_store
+from services.http_client import create_http_client, pool_stats
+from services.location_input import clean_location
+from services.metrics import REGISTRY
+from services.push import create_broadcaster
+from services.rate_limiter import create_governor
+from services.refresh import create_refresher
+from services.resilience import create_breakers, create_retry_policy
+from services.serialization import entry_body
+from services.singleflight import SingleFlight
+from services.weather_service import WeatherService
+from settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def validate_payload(kind: str, value: Any) -> Any:
+    """Check a transformed payload against the API models before it is cached
+
+    Runs once per upstream fetch rather than per response, so cache hits keep
+    returning pre-encoded bytes. Raises pydantic.ValidationError.
+    """
+    if kind == "current":
+        WeatherData.model_validate(value)
+    elif kind == "forecast":
+        for day in value:
+            ForecastDay.model_validate(day)
+    return value
+
+
+class WeatherBackend:
+    """The cache, upstream client and background tasks behind the API
+
+    Created and started by the app lifespan, so importing or building the
+    app opens no connections, loads no data and starts no tasks.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        # Bounded TTL cache; set CACHE_BACKEND to choose the backend
+        self.cache = create_cache()
+        # Warm-start snapshot of the in-process cache (CACHE_SNAPSHOT_PATH)
+        self.snapshotter = create_snapshotter(self.cache)
+        # Budget for outbound OpenWeather calls (per-minute and per-day limits)
+        self.governor = create_governor()
+        # Retries for transient upstream failures and per-endpoint circuit breakers
+        self.retries = create_retry_policy()
+        self.breakers = create_breakers()
+        self.service = WeatherService(
+            api_key=settings.openweather_api_key,
+            governor=self.governor,
+            retry_policy=self.retries,
+            breakers=self.breakers
+        )
+        # Concurrent misses for the same key share one upstream call
+        self.flights = SingleFlight()
+        # Serves stale entries while revalidating and refreshes hot keys ahead of expiry
+        self.refresher = create_refresher(self.cache, self.flights)
+        # Server-Sent Events fan-out: one refresh per followed city per interval
+        self.push = create_broadcaster()
+        # Every current-weather fetch, kept with hourly and daily rollups (HISTORY_PATH)
+        self.history = create_history_store()
+        # Offline gazetteer answering most city searches without an upstream call
+        self.city_index = None
+        self.started_at = time.monotonic()
+
+        # Upstream 404s, and lookups answered from the negative cache instead of going upstream
+        self.not_found_upstream = 0
+        self.not_found_cached = 0
+
+    async def start(self) -> None:
+        self.started_at = time.monotonic()
+        self.city_index = load_city_index()
+        self.service.client = create_http_client()
+        await self.cache.start()
+        if self.snapshotter is not None:
+            await self.snapshotter.start()
+        await self.refresher.start()
+        await self.push.start()
+        if self.history is not None:
+            await self.history.start()
+        self.register_metrics()
+
+    async def stop(self) -> None:
+        """Stop background work, let in-flight upstream calls land in the cache, then flush and close"""
+        await self.push.stop()
+        await self.refresher.stop()
+        still_running = await self.flights.drain(self.settings.drain_timeout)
+        if still_running:
+            logger.warning("Shutting down with %d upstream calls still in flight", still_running)
+        if self.snapshotter is not None:
+            await self.snapshotter.stop()
+        await self.cache.stop()
+        if self.history is not None:
+            await self.history.stop()
+        await self.service.aclose()
+
+    def register_metrics(self) -> None:
+        """Export the counters kept by the cache and upstream guards as scrape-time metrics"""
+        cache = self.cache
+        memory = getattr(cache, "l1", cache)
+        REGISTRY.callback("weather_cache_hits_total", "Fresh cache hits", "counter", lambda: cache.hits)
+        REGISTRY.callback("weather_cache_stale_hits_total", "Stale cache hits served while revalidating", "counter", lambda: cache.stale_hits)
+        REGISTRY.callback("weather_cache_misses_total", "Cache misses", "counter", lambda: cache.misses)
+        REGISTRY.callback("weather_cache_evictions_total", "Entries evicted by the LRU bounds", "counter", lambda: memory.evictions)
+        REGISTRY.callback("weather_cache_expirations_total", "Entries dropped past their hard TTL", "counter", lambda: memory.expirations)
+        REGISTRY.callback("weather_cache_entries", "Entries in the in-process cache", "gauge", lambda: len(memory))
+        REGISTRY.callback("weather_single_flight_coalesced_total", "Requests that joined an in-flight upstream call", "counter", lambda: self.flights.coalesced)
+        REGISTRY.callback("weather_refresh_failures_total", "Failed background refreshes", "counter", lambda: self.refresher.refresh_failures)
+        REGISTRY.callback("weather_upstream_retries_total", "Retried OpenWeather calls", "counter", lambda: self.retries.retries)
+        REGISTRY.callback("weather_upstream_throttled_total", "Upstream calls that waited for quota", "counter", lambda: self.governor.throttled)
+        REGISTRY.callback("weather_upstream_rejected_total", "Upstream calls rejected for lack of quota", "counter", lambda: self.governor.rejected)
+        REGISTRY.callback(
+            "weather_upstream_budget_remaining", "Upstream calls left in this worker's per-minute and per-day budgets", "gauge",
+            lambda: [((window,), remaining) for window, remaining in self.governor.remaining().items() if remaining is not None],
+            labelnames=["window"],
+        )
+        REGISTRY.callback("weather_not_found_cached_total", "Unknown locations answered from the negative cache", "counter", lambda: self.not_found_cached)
+        REGISTRY.callback("weather_push_connections", "Open push (SSE) connections", "gauge", lambda: len(self.push._subscriptions))
+        REGISTRY.callback("weather_push_published_total", "City updates published to push connections", "counter", lambda: self.push.published)
+        REGISTRY.callback(
+            "weather_circuit_open", "1 while the circuit for an OpenWeather endpoint is not closed", "gauge",
+            lambda: [((endpoint,), int(state["state"] != "closed")) for endpoint, state in self.breakers.stats().items()],
+            labelnames=["endpoint"],
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http_pool": pool_stats(self.service.client),
+            "cache": self.cache.stats(),
+            "single_flight": self.flights.stats(),
+            "refresh": self.refresher.stats(),
+            "cache_snapshot": self.snapshotter.stats() if self.snapshotter is not None else None,
+            "upstream_budget": self.governor.stats(),
+            "upstream_retries": self.retries.stats(),
+            "circuit_breakers": self.breakers.stats(),
+            "push": self.push.stats(),
+            "history": self.history.stats() if self.history is not None else None,
+            "geo_index": self.city_index.stats() if self.city_index is not None else None,
+            "not_found": {"upstream": self.not_found_upstream, "cached": self.not_found_cached},
+        }
+
+    def cache_key(
+        self,
+        city: Optional[str],
+        country_code: Optional[str],
+        lat: Optional[float] = None,
+        lon: Optional[float] = None
+    ) -> str:
+        """Normalized cache / single-flight key for a lookup
+
+        Coordinates map to a geohash grid cell so nearby point requests share
+        one entry. City names the local gazetteer can place are keyed by that
+        place, so every spelling of it shares one entry labelled with its name.
+        Unknown names fall back to a normalized name key.
+        """
+        return self._key(city, country_code, *self.locate(city, country_code, lat, lon))
+
+    def _key(
+        self,
+        city: Optional[str],
+        country_code: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        place: Optional[Dict[str, Any]]
+    ) -> str:
+        if lat is None or lon is None:
+            return f"name:{normalize_name(city or '')}_{(country_code or 'default').strip().lower()}"
+        cell = geohash_encode(lat, lon, self.settings.cache_geohash_precision)
+        if place is None:
+            return f"geo:{cell}"
+        # Kept apart from point requests, whose entries carry the weather station's name
+        return f"place:{normalize_name(place['name'])}_{(place['country'] or '').lower()}_{cell}"
+
+    def locate(
+        self,
+        city: Optional[str],
+        country_code: Optional[str],
+        lat: Optional[float] = None,
+        lon: Optional[float] = None
+    ) -> Tuple[Optional[float], Optional[float], Optional[Dict[str, Any]]]:
+        """Coordinates for a lookup, as given or from the gazetteer record of a known city name"""
+        if (lat is None or lon is None) and city and self.city_index is not None:
+            place = self.city_index.place(city, country_code)
+            if place is not None:
+                return place["lat"], place["lon"], place
+        return lat, lon, None
+
+    async def load_weather(
+        self,
+        kind: str,
+        city: Optional[str],
+        country_code: Optional[str],
+        limiter: Optional[asyncio.Semaphore] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        encode: bool = False
+    ) -> CacheEntry:
+        """Cached lookup of current weather or forecast returning the cache entry; limiter only gates upstream calls
+
+        With encode, the entry's response body is encoded (once) before it is returned.
+
+        Raises InvalidLocation for input that cannot name a place and
+        LocationNotFound for places OpenWeather does not know; the latter is
+        remembered for CACHE_TTL_NOTFOUND seconds.
+        """
+        city, country_code = clean_location(city or None, country_code)
+        # A city the gazetteer knows is fetched by the coordinates its cache key is built from,
+        # so the entry holds that place and not whichever namesake OpenWeather would pick
+        lat, lon, place = self.locate(city, country_code, lat, lon)
+        key = self._key(city, country_code, lat, lon, place)
+        if self.service.fetch_mode == "separate":
+            get = self.service.get_current_weather if kind == "current" else self.service.get_forecast
+
+            async def fetch():
+                value = await get(city, country_code, lat, lon)
+                if kind != "current":
+                    return validate_payload(kind, value)
+                value = validate_payload(kind, _named(value, place))
+                self._record(key, value)
+                return value
+        else:
+            async def fetch():
+                return await self._fetch_combined(kind, key, city, country_code, lat, lon, place)
+
+        async def loader():
+            # Only consulted on a miss, so cache hits cost nothing extra
+            if await self.cache.contains("notfound", key):
+                self.not_found_cached += 1
+                raise LocationNotFound(f"{city or key} not found (cached)")
+            try:
+                if limiter is None:
+                    return await fetch()
+                async with limiter:
+                    return await fetch()
+            except LocationNotFound:
+                self.not_found_upstream += 1
+                await self.cache.set("notfound", key, True)
+                raise
+
+        entry = await self.refresher.get_or_load_entry(kind, key, loader)
+        if encode and entry.body is None:
+            # Encode now rather than in the response, so CACHE_MAX_BYTES counts the bodies too
+            entry_body(entry)
+            self.cache.resize(kind, key, entry)
+        return entry
+
+    def _record(self, key: str, current: Dict[str, Any]) -> None:
+        if self.history is not None:
+            self.history.record(key, current)
+
+    async def search_cities(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Cached upstream geocoding search for a query already passed through clean_city"""
+        return await self.refresher.get_or_load(
+            "search",
+            f"{query.casefold()}_{limit}",
+            lambda: self.service.search_cities(query, limit)
+        )
+
+    async def _fetch_combined(
+        self,
+        kind: str,
+        key: str,
+        city: Optional[str],
+        country_code: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float],
+        place: Optional[Dict[str, Any]]
+    ) -> Any:
+        """One upstream call for both kinds; the other kind's cache entry is filled from the same response"""
+        async def fetch_both():
+            combined = await self.service.get_combined(city, country_code, lat, lon, place=place)
+            combined["current"] = _named(combined["current"], place)
+            for each, value in combined.items():
+                validate_payload(each, value)
+            self._record(key, combined["current"])
+            other = "forecast" if kind == "current" else "current"
+            await self.cache.set(other, key, combined[other])
+            return combined
+
+        # A dashboard asks for both kinds at once; both misses share this call
+        combined = await self.flights.do(f"combined:{key}", fetch_both)
+        return combined[kind]
+
+
+def _named(current: Dict[str, Any], place: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Label current weather fetched by gazetteer coordinates with the requested city, not the nearest station"""
+    if place is None:
+        return current
+    return {**current, "city": place["name"], "country": place["country"] or current["country"]}
@@ -1,58 +1,220 @@
+import asyncio
 import httpx
 import logging
+import time
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import os
+from services.errors import LocationNotFound, QuotaExceeded
+from services.forecast_aggregation import aggregate_forecast, summarize_daily
+from services.http_client import create_http_client
+from services.metrics import TRANSFORM_LATENCY, UPSTREAM_LATENCY
+from services.rate_limiter import QuotaGovernor
+from services.resilience import RETRYABLE_STATUSES, CircuitBreakers, RetryPolicy
 
 logger = logging.getLogger(__name__)
 
+# separate: /weather and /forecast calls; forecast: one /forecast call, current
+# conditions taken from its first slot; onecall: One Call 3.0 for both
+FETCH_MODES = ("separate", "forecast", "onecall")
+
 class WeatherService:
     """Service class for handling weather API interactions"""
     
-    def __init__(self):
-        self.api_key = os.getenv("OPENWEATHER_API_KEY")
-        self.base_url = "https://api.openweathermap.org/data/2.5"
-        self.geo_url = "http://api.openweathermap.org/geo/1.0/direct"
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        api_key: Optional[str] = None,
+        governor: Optional[QuotaGovernor] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        fetch_mode: Optional[str] = None
+    ):
+        self.api_key = api_key or os.getenv("OPENWEATHER_API_KEY")
+        # Overridable so benchmarks can point at benchmarks/mock_openweather.py
+        api_root = os.getenv("OPENWEATHER_API_ROOT", "https://api.openweathermap.org").rstrip("/")
+        self.base_url = f"{api_root}/data/2.5"
+        self.geo_url = f"{api_root}/geo/1.0/direct"
+        self.onecall_url = f"{api_root}/data/3.0/onecall"
+        self.fetch_mode = (fetch_mode or os.getenv("UPSTREAM_FETCH_MODE", "separate")).lower()
+        if self.fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown upstream fetch mode: {self.fetch_mode}")
+        self.client = client
+        self.governor = governor
+        self.retry_policy = retry_policy
+        self.breakers = breakers
         
         if not self.api_key:
             logger.warning("OpenWeather API key not configured")
     
-    async def get_current_weather(self, city: str, country_code: Optional[str] = None) -> Dict[str, Any]:
-        """Fetch current weather for a city"""
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared pooled client, created on first use if the app did not provide one"""
+        if self.client is None or self.client.is_closed:
+            self.client = create_http_client()
+        return self.client
+    
+    async def aclose(self) -> None:
+        """Close the pooled client and its keep-alive connections"""
+        if self.client is not None and not self.client.is_closed:
+            await self.client.aclose()
+        self.client = None
+    
+    async def _get(self, endpoint: str, url: str, params: Dict[str, Any]) -> Any:
+        """Budgeted, retried and circuit-broken GET against OpenWeather returning the JSON body"""
+        breaker = self.breakers.get(endpoint) if self.breakers is not None else None
+        probe = breaker.before_call() if breaker is not None else False
+        if self.retry_policy is not None:
+            self.retry_policy.record_request()
+        
+        started_at = time.monotonic()
+        attempt = 1
+        try:
+            while True:
+                if self.governor is not None:
+                    await self.governor.acquire()
+                
+                call_started = time.perf_counter()
+                try:
+                    response = await self.http_client.get(url, params=params)
+                except httpx.TransportError as e:
+                    UPSTREAM_LATENCY.observe(time.perf_counter() - call_started, endpoint=endpoint, outcome=type(e).__name__)
+                    delay = self._retry_delay(attempt, started_at)
+                    if delay is not None:
+                        logger.warning("Retrying OpenWeather %s after %s (attempt %d)", endpoint, type(e).__name__, attempt)
+                        await asyncio.sleep(delay)
+                        attempt += 1
+                        continue
+                    if breaker is not None:
+                        breaker.record_failure()
+                    raise
+                UPSTREAM_LATENCY.observe(time.perf_counter() - call_started, endpoint=endpoint, outcome=response.status_code)
+                
+                if response.status_code in RETRYABLE_STATUSES:
+                    delay = self._retry_delay(attempt, started_at)
+                    if delay is not None:
+                        logger.warning("Retrying OpenWeather %s after HTTP %d (attempt %d)", endpoint, response.status_code, attempt)
+                        await asyncio.sleep(delay)
+                        attempt += 1
+                        continue
+                    if breaker is not None:
+                        breaker.record_failure()
+                    response.raise_for_status()
+                
+                # Any other answer means the endpoint is up, even a 4xx
+                if breaker is not None:
+                    breaker.record_success()
+                break
+        finally:
+            if probe:
+                # A probe that ended without an upstream answer (quota, cancellation) must not keep the breaker half-open
+                breaker.release_probe()
+        
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get("Retry-After", 60))
+            except ValueError:
+                retry_after = 60.0
+            if self.governor is not None:
+                self.governor.penalize(retry_after)
+            raise QuotaExceeded("OpenWeather rate limit reached", retry_after=retry_after)
+        if response.status_code == 404:
+            raise LocationNotFound(f"OpenWeather {endpoint}: {params.get('q') or 'location'} not found")
+        response.raise_for_status()
+        return response.json()
+    
+    def _retry_delay(self, attempt: int, started_at: float) -> Optional[float]:
+        """Backoff before the next attempt, or None if the call must not be retried"""
+        if self.retry_policy is None:
+            return None
+        delay = self.retry_policy.backoff(attempt)
+        return delay if self.retry_policy.allow_retry(attempt, started_at, delay) else None
+    
+    async def get_current_weather(
+        self,
+        city: Optional[str] = None,
+        country_code: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Fetch current weather for a city, or for a point when lat/lon are given"""
         if not self.api_key:
             raise ValueError("OpenWeather API key not configured")
         
-        params = {
-            "q": f"{city},{country_code}" if country_code else city,
-            "appid": self.api_key,
-            "units": "metric"
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/weather", params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+        params = self._location_params(city, country_code, lat, lon)
+        data = await self._get("weather", f"{self.base_url}/weather", params)
+        with TRANSFORM_LATENCY.time(kind="current"):
             return self._transform_current_weather(data)
     
-    async def get_forecast(self, city: str, country_code: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Fetch 5-day forecast for a city"""
+    async def get_forecast(
+        self,
+        city: Optional[str] = None,
+        country_code: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch 5-day forecast for a city, or for a point when lat/lon are given"""
         if not self.api_key:
             raise ValueError("OpenWeather API key not configured")
         
-        params = {
-            "q": f"{city},{country_code}" if country_code else city,
-            "appid": self.api_key,
-            "units": "metric"
-        }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/forecast", params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+        params = self._location_params(city, country_code, lat, lon)
+        data = await self._get("forecast", f"{self.base_url}/forecast", params)
+        with TRANSFORM_LATENCY.time(kind="forecast"):
             return self._transform_forecast(data)
     
+    async def get_combined(
+        self,
+        city: Optional[str] = None,
+        country_code: Optional[str] = None,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        place: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Current weather and forecast from a single upstream call
+        
+        Returns {"current": ..., "forecast": ...}. One Call needs coordinates
+        and a display name, taken from `place` (a gazetteer record); without
+        one the single /forecast call is used instead.
+        """
+        if not self.api_key:
+            raise ValueError("OpenWeather API key not configured")
+        
+        if self.fetch_mode == "onecall" and place is not None:
+            params = {
+                "lat": place["lat"],
+                "lon": place["lon"],
+                "exclude": "minutely,hourly,alerts",
+                "appid": self.api_key,
+                "units": "metric"
+            }
+            data = await self._get("onecall", self.onecall_url, params)
+            with TRANSFORM_LATENCY.time(kind="onecall"):
+                return self._transform_onecall(data, place)
+        
+        params = self._location_params(city, country_code, lat, lon)
+        data = await self._get("forecast", f"{self.base_url}/forecast", params)
+        with TRANSFORM_LATENCY.time(kind="combined"):
+            return {
+                "current": self._transform_current_weather(self._current_from_forecast(data)),
+                "forecast": self._transform_forecast(data)
+            }
+    
+    def _location_params(
+        self,
+        city: Optional[str],
+        country_code: Optional[str],
+        lat: Optional[float],
+        lon: Optional[float]
+    ) -> Dict[str, Any]:
+        """Query parameters locating the request by coordinates or by city name"""
+        if lat is not None and lon is not None:
+            location = {"lat": lat, "lon": lon}
+        elif city:
+            location = {"q": f"{city},{country_code}" if country_code else city}
+        else:
+            raise ValueError("Either a city or lat/lon must be given")
+        return {**location, "appid": self.api_key, "units": "metric"}
+    
     async def search_cities(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search for cities by name"""
         if not self.api_key:
@@ -64,11 +226,8 @@ class WeatherService:
             "appid": self.api_key
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.geo_url, params=params)
-            response.raise_for_status()
-            
-            cities = response.json()
+        cities = await self._get("geocoding", self.geo_url, params)
+        with TRANSFORM_LATENCY.time(kind="search"):
             return self._transform_city_search(cities)
     
     def _transform_current_weather(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -90,51 +249,65 @@ class WeatherService:
                 "timestamp": datetime.now().isoformat()
             }
         except KeyError as e:
-            logger.error(f"Missing key in weather data: {e}")
+            logger.error("Missing key in weather data: %s", e)
             raise ValueError(f"Invalid weather data format: missing {e}")
     
     def _transform_forecast(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Transform OpenWeather forecast response to our format"""
         try:
-            daily_forecasts = {}
-            
-            for item in data["list"]:
-                date = datetime.fromtimestamp(item["dt"]).strftime("%Y-%m-%d")
-                if date not in daily_forecasts:
-                    daily_forecasts[date] = {
-                        "temps": [],
-                        "conditions": [],
-                        "descriptions": []
-                    }
-                
-                daily_forecasts[date]["temps"].append(item["main"]["temp"])
-                daily_forecasts[date]["conditions"].append(item["weather"][0]["main"].lower())
-                daily_forecasts[date]["descriptions"].append(item["weather"][0]["description"])
-            
-            # Transform to our forecast format
-            forecast_data = []
-            days = ["Today", "Tomorrow", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            
-            for i, (date, forecast) in enumerate(list(daily_forecasts.items())[:5]):
-                # Get most common condition and description
-                condition = max(set(forecast["conditions"]), key=forecast["conditions"].count)
-                description = max(set(forecast["descriptions"]), key=forecast["descriptions"].count)
-                
-                forecast_data.append({
-                    "date": date,
-                    "day": days[i] if i < len(days) else datetime.strptime(date, "%Y-%m-%d").strftime("%A"),
-                    "high": round(max(forecast["temps"])),
-                    "low": round(min(forecast["temps"])),
-                    "condition": condition,
-                    "description": description
-                })
-            
-            return forecast_data
+            return aggregate_forecast(data, days=5)
             
         except KeyError as e:
-            logger.error(f"Missing key in forecast data: {e}")
+            logger.error("Missing key in forecast data: %s", e)
             raise ValueError(f"Invalid forecast data format: missing {e}")
     
+    def _current_from_forecast(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape the nearest forecast slot like a /weather response"""
+        try:
+            item = data["list"][0]
+            city = data["city"]
+            return {
+                "name": city["name"],
+                "sys": {
+                    "country": city.get("country", ""),
+                    "sunrise": city.get("sunrise", 0),
+                    "sunset": city.get("sunset", 0)
+                },
+                "main": item["main"],
+                "weather": item["weather"],
+                "wind": item.get("wind", {"speed": 0}),
+                "visibility": item.get("visibility", 10000)
+            }
+        except (KeyError, IndexError) as e:
+            logger.error("Missing key in forecast data: %s", e)
+            raise ValueError(f"Invalid forecast data format: missing {e}")
+    
+    def _transform_onecall(self, data: Dict[str, Any], place: Dict[str, Any]) -> Dict[str, Any]:
+        """Transform a One Call response into our current weather and forecast formats"""
+        try:
+            current = data["current"]
+            return {
+                "current": {
+                    "city": place["name"],
+                    "country": place.get("country") or "",
+                    "temperature": round(current["temp"]),
+                    "condition": current["weather"][0]["main"].lower(),
+                    "description": current["weather"][0]["description"],
+                    "humidity": current["humidity"],
+                    "windSpeed": round(current["wind_speed"] * 3.6),  # Convert m/s to km/h
+                    "visibility": round(current.get("visibility", 10000) / 1000),  # Convert m to km
+                    "feelsLike": round(current["feels_like"]),
+                    "pressure": current["pressure"],
+                    "sunrise": current.get("sunrise", 0),
+                    "sunset": current.get("sunset", 0),
+                    "timestamp": datetime.now().isoformat()
+                },
+                "forecast": summarize_daily(data["daily"], data.get("timezone_offset", 0), days=5)
+            }
+        except (KeyError, IndexError) as e:
+            logger.error("Missing key in One Call data: %s", e)
+            raise ValueError(f"Invalid One Call data format: missing {e}")
+    
     def _transform_city_search(self, cities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform city search response to our format"""
         try:
@@ -150,7 +323,7 @@ class WeatherService:
             return results
             
         except KeyError as e:
-            logger.error(f"Missing key in city search data: {e}")
+            logger.error("Missing key in city search data: %s", e)
             raise ValueError(f"Invalid city search data format: missing {e}")
     
     def validate_api_key(self) -> bool:
@@ -0,0 +1,56 @@
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """App-level configuration passed to create_app
+
+    Tuning for the individual services (cache, upstream limits, push, ...)
+    stays in each service's create_*() factory.
+    """
+    openweather_api_key: Optional[str] = None
+    cors_origins: Tuple[str, ...] = ("http://localhost:5173",)
+    log_level: str = "INFO"
+    # Upper bound on upstream calls a single batch request may run at once
+    batch_concurrency: int = 10
+    # Geohash length of the grid cell shared by nearby lookups (5 is about 4.9 x 4.9 km)
+    cache_geohash_precision: int = 5
+    # Most cities a single push connection may follow
+    push_max_cities: int = 20
+    # Requests handled at once per worker before new ones queue, queue length
+    # and how long they may wait before getting a 503; 0 disables the limit
+    admission_max_in_flight: int = 256
+    admission_max_queue: int = 128
+    admission_queue_timeout: float = 0.5
+    # Seconds shutdown waits for in-flight upstream calls before closing the client
+    drain_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            openweather_api_key=os.getenv("OPENWEATHER_API_KEY"),
+            cors_origins=tuple(os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",")),
+            log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            batch_concurrency=int(os.getenv("BATCH_CONCURRENCY", 10)),
+            cache_geohash_precision=int(os.getenv("CACHE_GEOHASH_PRECISION", 5)),
+            push_max_cities=int(os.getenv("PUSH_MAX_CITIES", 20)),
+            admission_max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 256)),
+            admission_max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", 128)),
+            admission_queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 0.5)),
+            drain_timeout=float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 10)),
+        )
+
+
+def load_env() -> None:
+    """Load .env into the environment; variables already set take precedence"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def load_settings() -> Settings:
+    """Read settings from the environment after loading .env"""
+    load_env()
+    return Settings.from_env()
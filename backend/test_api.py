@@ -43,7 +43,7 @@ async def test_backend():
         # Test 3: Current weather (London)
         print("\n3. Testing current weather API...")
         try:
-            response = await client.get(f"{base_url}/api/weather/current", params={"city": "London"})
+            response = await client.get(f"{base_url}/weather/current", params={"city": "London"})
             if response.status_code == 200:
                 data = response.json()
                 print(f"   ✅ Current weather for London: {data['temperature']}°C, {data['condition']}")
@@ -56,7 +56,7 @@ async def test_backend():
         # Test 4: Forecast (London)
         print("\n4. Testing forecast API...")
         try:
-            response = await client.get(f"{base_url}/api/weather/forecast", params={"city": "London"})
+            response = await client.get(f"{base_url}/weather/forecast", params={"city": "London"})
             if response.status_code == 200:
                 data = response.json()
                 print(f"   ✅ Forecast for London: {len(data)} days")
@@ -72,7 +72,7 @@ async def test_backend():
         # Test 5: City search
         print("\n5. Testing city search API...")
         try:
-            response = await client.get(f"{base_url}/api/weather/search", params={"query": "lon", "limit": 3})
+            response = await client.get(f"{base_url}/weather/search", params={"query": "lon", "limit": 3})
             if response.status_code == 200:
                 data = response.json()
                 print(f"   ✅ City search for 'lon': {len(data)} results")
@@ -0,0 +1,48 @@
+import gzip
+import time
+
+from starlette.requests import Request
+
+from services.cache import CacheEntry
+from services.http_cache import cached_response
+
+
+def make_request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/weather/forecast",
+        "headers": [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def make_entry():
+    now = time.time()
+    # Large enough to get precomputed compressed variants
+    value = [{"day": f"Day {i}", "high": 20, "low": 10, "condition": "clouds"} for i in range(40)]
+    return CacheEntry(value=value, stored_at=now, stale_at=now + 600, expires_at=now + 1200)
+
+
+def test_each_content_coding_has_its_own_etag():
+    entry = make_entry()
+    identity = cached_response(make_request(), entry)
+    gzipped = cached_response(make_request(accept_encoding="gzip"), entry)
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(gzipped.body) == identity.body
+    assert identity.headers["etag"] != gzipped.headers["etag"]
+    assert gzipped.headers["etag"] == identity.headers["etag"][:-1] + '-gzip"'
+    assert identity.headers["vary"] == gzipped.headers["vary"] == "Accept-Encoding"
+
+
+def test_not_modified_only_for_the_etag_of_the_same_coding():
+    entry = make_entry()
+    gzip_etag = cached_response(make_request(accept_encoding="gzip"), entry).headers["etag"]
+
+    not_modified = cached_response(make_request(accept_encoding="gzip", if_none_match=gzip_etag), entry)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["vary"] == "Accept-Encoding"
+    assert not_modified.headers["etag"] == gzip_etag
+
+    # The gzip validator does not validate the identity representation
+    assert cached_response(make_request(if_none_match=gzip_etag), entry).status_code == 200
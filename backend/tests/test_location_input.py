@@ -0,0 +1,41 @@
+import pytest
+
+from services.errors import InvalidLocation
+from services.location_input import clean_city, clean_location
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("  London ", "London"),
+    ("Ｓão　 Paulo", "São Paulo"),
+    ("दिल्ली", "दिल्ली"),
+    ("St. John's", "St. John's"),
+    ("Washington, D.C.", "Washington, D.C."),
+])
+def test_clean_city(raw, expected):
+    assert clean_city(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["", "   ", "<script>", "1234", "x" * 101, "Lon\x00don", "' OR 1=1 --"])
+def test_clean_city_rejects(raw):
+    with pytest.raises(InvalidLocation):
+        clean_city(raw)
+
+
+@pytest.mark.parametrize("city, country_code, expected", [
+    ("London,GB", None, ("London", "GB")),
+    ("london , gb", None, ("london", "GB")),
+    ("London，GB", None, ("London", "GB")),
+    ("London,GB", "gb", ("London", "GB")),
+    ("London", " gb ", ("London", "GB")),
+    ("Springfield, IL, US", None, ("Springfield, IL", "US")),
+    ("Washington, D.C.", None, ("Washington, D.C.", None)),
+    (None, "US", (None, "US")),
+])
+def test_clean_location_splits_embedded_country(city, country_code, expected):
+    assert clean_location(city, country_code) == expected
+
+
+@pytest.mark.parametrize("city, country_code", [("London,GB", "US"), ("London", "GBR"), ("London", "1A")])
+def test_clean_location_rejects(city, country_code):
+    with pytest.raises(InvalidLocation):
+        clean_location(city, country_code)
@@ -0,0 +1,14 @@
+import dotenv
+
+from main import create_app
+from settings import Settings
+
+
+def test_env_file_is_loaded_when_settings_are_passed_in(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(dotenv, "load_dotenv", lambda *args, **kwargs: loaded.append(1))
+
+    app = create_app(Settings(openweather_api_key="test"))
+
+    assert loaded == [1]
+    assert app.state.settings.openweather_api_key == "test"
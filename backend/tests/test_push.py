@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+from services.push import WeatherBroadcaster
+
+
+def test_each_subscriber_gets_its_own_labels_on_a_shared_topic():
+    async def scenario():
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return 1, {"current": {"temperature": 12}, "errors": {}}
+
+        broadcaster = WeatherBroadcaster(interval=0)
+        first = broadcaster.subscribe({"geo:gcpvj": loader}, {"geo:gcpvj": [{"city": "London", "country_code": None}]})
+        await broadcaster.refresh()
+        # A later subscriber is replayed the latest update, under its own labels
+        second = broadcaster.subscribe({"geo:gcpvj": loader}, {"geo:gcpvj": [{"city": "london,gb", "country_code": "GB"}]})
+
+        [to_first] = await first.next_batch(0)
+        [to_second] = await second.next_batch(0)
+        assert json.loads(to_first) == {"city": "London", "country_code": None, "current": {"temperature": 12}, "errors": {}}
+        assert json.loads(to_second) == {"city": "london,gb", "country_code": "GB", "current": {"temperature": 12}, "errors": {}}
+        assert len(loads) == 1
+
+    asyncio.run(scenario())
+
+
+def test_every_spelling_on_one_connection_gets_its_own_event():
+    async def scenario():
+        async def loader():
+            return 1, {"errors": {}}
+
+        broadcaster = WeatherBroadcaster(interval=0)
+        subscription = broadcaster.subscribe({"place:london_gb": loader}, {"place:london_gb": [
+            {"city": "London", "country_code": None},
+            {"city": "London,GB", "country_code": "GB"},
+        ]})
+        await broadcaster.refresh()
+        batch = await subscription.next_batch(0)
+        assert [json.loads(message)["city"] for message in batch] == ["London", "London,GB"]
+
+    asyncio.run(scenario())
+
+
+def test_unlabelled_subscription_gets_the_payload_as_is():
+    async def scenario():
+        async def loader():
+            return 1, {"errors": {}}
+
+        broadcaster = WeatherBroadcaster(interval=0)
+        subscription = broadcaster.subscribe({"topic": loader})
+        await broadcaster.refresh()
+        assert await subscription.next_batch(0) == [b'{"errors":{}}']
+
+    asyncio.run(scenario())
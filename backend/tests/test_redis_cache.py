@@ -0,0 +1,203 @@
+import asyncio
+import time
+
+from services.cache import MemoryCache
+from services.redis_cache import RedisError, TieredCache
+
+
+class FakeRedisServer:
+    """The few Redis commands TieredCache uses, shared by several clients like one real server"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.channels = {}
+        self.down = False
+
+    def check(self):
+        if self.down:
+            raise RedisError("connection refused")
+
+    def live(self, key):
+        if key in self.expiry and self.expiry[key] <= time.monotonic():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.data
+
+
+class FakeRedis:
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+
+    async def get(self, key):
+        self.server.check()
+        return self.server.data[key] if self.server.live(key) else None
+
+    async def set(self, key, value, px=None, nx=False):
+        self.server.check()
+        if nx and self.server.live(key):
+            return None
+        self.server.data[key] = value.encode() if isinstance(value, str) else value
+        if px is not None:
+            self.server.expiry[key] = time.monotonic() + px / 1000
+        return True
+
+    async def exists(self, key):
+        self.server.check()
+        return int(self.server.live(key))
+
+    async def delete(self, *keys):
+        self.server.check()
+        return sum(self.server.data.pop(key, None) is not None for key in keys)
+
+    async def eval(self, script, numkeys, key, token):
+        # Only the compare-and-delete lock release script is used
+        self.server.check()
+        if self.server.live(key) and self.server.data[key] == token.encode():
+            return await self.delete(key)
+        return 0
+
+    async def publish(self, channel, data):
+        self.server.check()
+        for queue in self.server.channels.get(channel, ()):
+            queue.put_nowait({"type": "message", "channel": channel, "data": data})
+
+    def pubsub(self):
+        return FakePubSub(self.server)
+
+    async def aclose(self):
+        pass
+
+
+class FakePubSub:
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+        self.queue = asyncio.Queue()
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.server.check()
+        self.server.channels.setdefault(channel, []).append(self.queue)
+        self.channels.append(channel)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self):
+        for channel in self.channels:
+            self.server.channels[channel].remove(self.queue)
+
+
+def make_worker(server, **options):
+    return TieredCache(FakeRedis(server), l1=MemoryCache(), lock_poll_interval=0.01, **options)
+
+
+async def until(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.005)
+
+
+def test_l1_is_filled_from_l2():
+    async def scenario():
+        server = FakeRedisServer()
+        a, b = make_worker(server), make_worker(server)
+        await a.set("current", "london", {"temperature": 12})
+
+        entry = await b.get_entry("current", "london")
+        assert entry.value == {"temperature": 12}
+        assert b.l2_hits == 1
+        # The copy now lives in b's L1, so the next read does not touch Redis
+        assert b.l1.peek("current", "london") is not None
+        server.down = True
+        assert (await b.get_entry("current", "london")).value == {"temperature": 12}
+        assert b.l2_errors == 0
+
+    asyncio.run(scenario())
+
+
+def test_writes_invalidate_other_workers_l1():
+    async def scenario():
+        server = FakeRedisServer()
+        a, b = make_worker(server), make_worker(server)
+        await a.start()
+        await b.start()
+        await until(lambda: len(server.channels.get(a.channel, ())) == 2)
+
+        await a.set("current", "london", {"temperature": 12})
+        await until(lambda: b.invalidations == 1)
+        assert (await b.get_entry("current", "london")).value == {"temperature": 12}
+
+        await a.set("current", "london", {"temperature": 14})
+        await until(lambda: b.invalidations == 2)
+        assert b.l1.peek("current", "london") is None
+        assert (await b.get_entry("current", "london")).value == {"temperature": 14}
+        # A worker ignores its own announcements
+        assert a.invalidations == 0
+
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_fill_lock_lets_one_worker_load_while_others_wait():
+    async def scenario():
+        server = FakeRedisServer()
+        a, b = make_worker(server), make_worker(server)
+        loaded = asyncio.Event()
+
+        async def winner():
+            async with a.fill_lock("current", "london") as owner:
+                assert owner is True
+                await loaded.wait()
+                await a.set("current", "london", {"temperature": 12})
+
+        async def waiter():
+            async with b.fill_lock("current", "london") as owner:
+                return owner
+
+        winning = asyncio.create_task(winner())
+        await until(lambda: a.locks_acquired == 1)
+        waiting = asyncio.create_task(waiter())
+        await until(lambda: b.lock_waits == 1)
+        loaded.set()
+        await winning
+
+        assert await waiting is False
+        assert b.remote_fills == 1
+        assert (await b.get_entry("current", "london")).value == {"temperature": 12}
+        assert not server.live("weather:lock:current:london")
+
+    asyncio.run(scenario())
+
+
+def test_waiter_loads_itself_when_the_lock_holder_stalls():
+    async def scenario():
+        server = FakeRedisServer()
+        a, b = make_worker(server), make_worker(server, lock_wait=0.05)
+        async with a.fill_lock("current", "london"):
+            async with b.fill_lock("current", "london") as owner:
+                assert owner is True
+        assert b.remote_fills == 0
+
+    asyncio.run(scenario())
+
+
+def test_redis_errors_fall_back_to_l1_only():
+    async def scenario():
+        server = FakeRedisServer()
+        server.down = True
+        cache = make_worker(server)
+
+        await cache.set("current", "london", {"temperature": 12})
+        assert (await cache.get_entry("current", "london")).value == {"temperature": 12}
+        assert await cache.get_entry("current", "paris") is None
+        async with cache.fill_lock("current", "paris") as owner:
+            assert owner is True
+        assert cache.l2_errors == 3
+        assert cache.stats()["misses"] == 1
+
+    asyncio.run(scenario())
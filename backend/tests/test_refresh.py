@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from services.cache import MemoryCache
+from services.errors import QuotaExceeded, UpstreamUnavailable
+from services.refresh import CacheRefresher
+from services.resilience import CircuitOpen
+
+
+def test_hot_entry_filled_outside_the_refresher_is_refreshed_ahead():
+    async def scenario():
+        cache = MemoryCache(sweep_interval=0)
+        refresher = CacheRefresher(cache, refresh_ahead=3600)
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return {"fresh": True}
+
+        # Stored directly, as a combined fetch stores the other kind
+        await cache.set("forecast", "geo:gcpvj", {"fresh": False})
+        entry = await refresher.get_or_load_entry("forecast", "geo:gcpvj", loader)
+        assert entry.value == {"fresh": False}
+        assert loads == []
+
+        assert await refresher.refresh_hot() == 1
+        assert loads == [1]
+        assert (await cache.get_entry("forecast", "geo:gcpvj")).value == {"fresh": True}
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("error", [QuotaExceeded("budget spent", retry_after=3600), CircuitOpen("open", retry_after=30)])
+def test_expired_entry_is_served_while_upstream_cannot_be_called(error):
+    async def scenario():
+        cache = MemoryCache(sweep_interval=0)
+        refresher = CacheRefresher(cache)
+
+        async def loader():
+            raise error
+
+        await cache.set("current", "geo:gcpvj", {"temperature": 12}, ttl=0, stale_ttl=0)
+        assert cache.sweep() == 0
+        entry = await refresher.get_or_load_entry("current", "geo:gcpvj", loader)
+        assert entry.is_expired()
+        assert entry.value == {"temperature": 12}
+        assert refresher.served_expired == 1
+
+        # Nothing cached at all still fails
+        with pytest.raises(UpstreamUnavailable):
+            await refresher.get_or_load_entry("current", "geo:u09tv", loader)
+
+    asyncio.run(scenario())
+
+
+def test_expired_entry_is_dropped_after_its_last_resort_window():
+    async def scenario():
+        cache = MemoryCache(sweep_interval=0, last_resort_ttl=0)
+        await cache.set("current", "geo:gcpvj", {"temperature": 12}, ttl=0, stale_ttl=0)
+        assert await cache.last_resort("current", "geo:gcpvj") is None
+        assert cache.sweep() == 1
+        assert len(cache) == 0
+
+    asyncio.run(scenario())
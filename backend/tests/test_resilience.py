@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.errors import QuotaExceeded
+from services.rate_limiter import QuotaGovernor
+from services.resilience import CircuitBreaker, CircuitBreakers, CircuitOpen
+from services.weather_service import WeatherService
+
+URL = "https://api.openweathermap.org/data/2.5/weather"
+
+
+def make_service(statuses, governor=None):
+    """WeatherService whose upstream answers with the given statuses in turn (200 once they run out)"""
+    statuses = list(statuses)
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0) if statuses else 200, json={})
+
+    return WeatherService(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        api_key="test",
+        governor=governor,
+        breakers=CircuitBreakers(failure_threshold=1, reset_timeout=0),
+    )
+
+
+def test_probe_rejected_by_quota_does_not_wedge_breaker():
+    async def scenario():
+        governor = QuotaGovernor(per_minute=1, max_wait=0)
+        service = make_service([503], governor)
+        breaker = service.breakers.get("weather")
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await service._get("weather", URL, {})
+        assert breaker.state == CircuitBreaker.OPEN
+
+        # The half-open probe never reaches upstream: the minute budget is spent
+        with pytest.raises(QuotaExceeded):
+            await service._get("weather", URL, {})
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        # With budget available again the next call is the probe and closes the circuit
+        service.governor = None
+        assert await service._get("weather", URL, {}) == {}
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_probe_does_not_wedge_breaker():
+    async def scenario():
+        entered = asyncio.Event()
+        service = make_service([503])
+        breaker = service.breakers.get("weather")
+        with pytest.raises(httpx.HTTPStatusError):
+            await service._get("weather", URL, {})
+
+        class SlowGovernor:
+            async def acquire(self):
+                entered.set()
+                await asyncio.sleep(10)
+
+        service.governor = SlowGovernor()
+        probe = asyncio.create_task(service._get("weather", URL, {}))
+        await entered.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        service.governor = None
+        assert await service._get("weather", URL, {}) == {}
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_half_open_admits_one_probe_at_a_time():
+    breaker = CircuitBreaker("weather", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.release_probe()
+    assert breaker.before_call() is True
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from services.errors import LocationNotFound
+from services.geo_index import load_city_index
+from services.weather_backend import WeatherBackend
+from settings import Settings
+
+
+def current_payload(name):
+    return {
+        "name": name,
+        "sys": {"country": "US", "sunrise": 1, "sunset": 2},
+        "main": {"temp": 12.3, "humidity": 80, "feels_like": 11.0, "pressure": 1010},
+        "weather": [{"main": "Clouds", "description": "broken clouds"}],
+        "wind": {"speed": 3.0},
+        "visibility": 9000,
+        "dt": int(time.time()),
+    }
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Unstarted WeatherBackend with the bundled gazetteer and a recording mock upstream"""
+    for name in ("CACHE_BACKEND", "UPSTREAM_FETCH_MODE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("CACHE_SNAPSHOT_PATH", "")
+    monkeypatch.setenv("HISTORY_PATH", "")
+
+    backend = WeatherBackend(Settings(openweather_api_key="test"))
+    backend.city_index = load_city_index()
+    backend.requests = []
+
+    def handler(request):
+        backend.requests.append(dict(request.url.params))
+        if request.url.params.get("q", "").startswith("Atlantis"):
+            return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+        # OpenWeather answers a name with its own pick of namesakes
+        return httpx.Response(200, json=current_payload("Springfield Station"))
+
+    backend.service.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return backend
+
+
+def test_gazetteer_city_is_fetched_by_the_coordinates_of_its_key(backend):
+    async def scenario():
+        entry = await backend.load_weather("current", "Springfield", None)
+        place = backend.city_index.place("Springfield")
+
+        assert len(backend.requests) == 1
+        params = backend.requests[0]
+        assert "q" not in params
+        assert (float(params["lat"]), float(params["lon"])) == (place["lat"], place["lon"])
+        assert entry.value["city"] == "Springfield"
+
+        # A point request in the same cell keeps its own entry, labelled by OpenWeather
+        point = await backend.load_weather("current", None, None, lat=place["lat"] + 0.001, lon=place["lon"])
+        assert point is not entry
+        assert point.value["city"] == "Springfield Station"
+
+    asyncio.run(scenario())
+
+
+def test_point_request_does_not_relabel_a_later_named_lookup(backend):
+    async def scenario():
+        place = backend.city_index.place("London", "GB")
+        point = await backend.load_weather("current", None, None, lat=place["lat"], lon=place["lon"])
+        named = await backend.load_weather("current", "London", None)
+
+        assert point.value["city"] == "Springfield Station"
+        assert named.value["city"] == "London"
+        assert len(backend.requests) == 2
+
+    asyncio.run(scenario())
+
+
+def test_unknown_city_is_fetched_by_name(backend):
+    async def scenario():
+        await backend.load_weather("current", "Nowhereville", "US")
+        assert backend.requests[0]["q"] == "Nowhereville,US"
+        assert backend.cache_key("Nowhereville", "US").startswith("name:")
+
+    asyncio.run(scenario())
+
+
+def test_embedded_country_code_shares_the_entry(backend):
+    async def scenario():
+        first = await backend.load_weather("current", "London,GB", None)
+        second = await backend.load_weather("current", "london", "gb")
+        assert second is first
+        assert len(backend.requests) == 1
+
+    asyncio.run(scenario())
+
+
+def test_upstream_404_is_cached_without_skewing_hit_ratio(backend):
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(LocationNotFound):
+                await backend.load_weather("current", "Atlantis", None)
+        assert len(backend.requests) == 1
+        assert backend.not_found_cached == 2
+
+        await backend.load_weather("current", "London", None)
+        await backend.load_weather("current", "London", None)
+        stats = backend.cache.stats()
+        # Three misses for Atlantis and one for London; negative-cache checks are not lookups
+        assert (stats["misses"], stats["hits"]) == (4, 1)
+
+    asyncio.run(scenario())
+
+
+def test_byte_bound_counts_encoded_bodies(backend):
+    async def scenario():
+        backend.cache.max_bytes = 1 << 20
+        entry = await backend.load_weather("current", "London", None)
+        value_bytes = backend.cache.total_bytes
+
+        served = await backend.load_weather("current", "London", None, encode=True)
+        assert served is entry
+        assert entry.body is not None
+        assert backend.cache.total_bytes == value_bytes + entry.body.size == entry.size
+
+        # A second serve does not count the body again
+        await backend.load_weather("current", "London", None, encode=True)
+        assert backend.cache.total_bytes == entry.size
+
+    asyncio.run(scenario())
@@ -25,6 +25,9 @@ export interface ForecastDay {
   day: string;
   high: number;
   low: number;
+  mean?: number;
+  precipitation?: number;
+  windMax?: number;
   condition: string;
   description: string;
 }
@@ -37,12 +40,41 @@ export interface CitySearchResult {
   lon: number;
 }
 
+export interface HistoryPoint {
+  time: number;
+  temperature: number | null;
+  humidity: number | null;
+  pressure: number | null;
+  windSpeed: number | null;
+  feelsLike?: number | null;
+  condition?: string | null;
+  samples?: number;
+  temperatureMin?: number | null;
+  temperatureMax?: number | null;
+  windMax?: number | null;
+}
+
+export type HistoryResolution = 'raw' | 'hour' | 'day';
+
+export interface WeatherUpdate {
+  /** The city exactly as passed to subscribeWeather */
+  city: string;
+  country_code: string | null;
+  current?: WeatherData;
+  forecast?: ForecastDay[];
+  errors: Record<string, { status: number; detail: string }>;
+}
+
 class WeatherApiService {
-  private async makeRequest<T>(endpoint: string, params?: Record<string, string>): Promise<T> {
+  private buildUrl(endpoint: string): URL {
     // Support absolute bases (http...) and relative bases (/api)
-    const url = API_BASE.startsWith('http')
+    return API_BASE.startsWith('http')
       ? new URL(endpoint, API_BASE)
       : new URL(`${API_BASE}${endpoint}`, window.location.origin);
+  }
+
+  private async makeRequest<T>(endpoint: string, params?: Record<string, string>): Promise<T> {
+    const url = this.buildUrl(endpoint);
     
     if (params) {
       Object.entries(params).forEach(([key, value]) => {
@@ -96,6 +128,34 @@ class WeatherApiService {
 
     return { current, forecast };
   }
+
+  async getHistory(
+    city: string,
+    days: number = 7,
+    resolution: HistoryResolution = 'hour',
+    countryCode?: string
+  ): Promise<HistoryPoint[]> {
+    const params: Record<string, string> = { city, days: days.toString(), resolution };
+    if (countryCode) {
+      params.country_code = countryCode;
+    }
+
+    const history = await this.makeRequest<{ points: HistoryPoint[] }>('/weather/history', params);
+    return history.points;
+  }
+
+  // Follow cities ("London" or "Paris,FR") over Server-Sent Events; call the returned function to stop
+  subscribeWeather(cities: string[], onUpdate: (update: WeatherUpdate) => void): () => void {
+    const url = this.buildUrl('/weather/stream');
+    cities.forEach((city) => url.searchParams.append('city', city));
+
+    const source = new EventSource(url.toString());
+    source.addEventListener('weather', (event) => {
+      onUpdate(JSON.parse((event as MessageEvent).data));
+    });
+
+    return () => source.close();
+  }
 }
 
 export const weatherApi = new WeatherApiService();